@@ -6,171 +6,196 @@ Allows users to login directly to their AI accounts without needing API keys
 
 import os
 import json
-import webbrowser
-import requests
-from urllib.parse import urlencode, parse_qs, urlparse
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import asyncio
 import threading
-import time
-from typing import Dict, Optional, Any
+import webbrowser
+from urllib.parse import urlencode
+from typing import Dict, List, Optional, Any, Tuple, TYPE_CHECKING
 import logging
 
+if TYPE_CHECKING:
+    from aiohttp import web
+
 logger = logging.getLogger(__name__)
 
+# API key format rules per provider: (required prefix, length the key must exceed)
+API_KEY_RULES = {
+    "openai": ("sk-", 0),
+    "anthropic": ("sk-ant-", 0),
+    "google": ("", 20),
+}
+
+# OAuth endpoints per provider
+OAUTH_PROVIDERS = {
+    "openai": {
+        "url": "https://platform.openai.com/oauth/authorize",
+        "client_id": "your_openai_client_id",  # You'd need to register your app
+        "scope": "read"
+    },
+    "anthropic": {
+        "url": "https://console.anthropic.com/oauth/authorize",
+        "client_id": "your_anthropic_client_id",
+        "scope": "read"
+    },
+    "google": {
+        "url": "https://accounts.google.com/o/oauth2/v2/auth",
+        "client_id": "your_google_client_id",
+        "scope": "https://www.googleapis.com/auth/generative-language"
+    }
+}
+
+# Callback pages, encoded once rather than on every callback
+SUCCESS_HTML = """
+<html>
+<head><title>Authentication Successful</title></head>
+<body>
+<h1>✅ Authentication Successful!</h1>
+<p>You can close this window and return to the application.</p>
+<script>window.close();</script>
+</body>
+</html>
+""".encode()
+
+ERROR_HTML = """
+<html>
+<head><title>Authentication Failed</title></head>
+<body>
+<h1>❌ Authentication Failed</h1>
+<p>Please try again or contact support.</p>
+</body>
+</html>
+""".encode()
+
 
 class AIOAuthHandler:
     """Handles OAuth-style authentication for AI providers"""
     
     def __init__(self):
         self.callback_port = 8080
-        self.auth_codes = {}
+        self._auth_urls = self._build_auth_urls()
+        # In-flight authentications keyed by state: (event set on callback, received codes)
+        self._pending: Dict[str, Tuple[asyncio.Event, List[str]]] = {}
+        self._runner: Optional["web.AppRunner"] = None
+        # Background loop that owns the callback server for the sync authenticate_user API
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
         
     def get_auth_url(self, provider: str) -> str:
         """Get authentication URL for the specified AI provider"""
-        auth_urls = {
-            "openai": {
-                "url": "https://platform.openai.com/oauth/authorize",
-                "client_id": "your_openai_client_id",  # You'd need to register your app
-                "scope": "read",
-                "redirect_uri": f"http://localhost:{self.callback_port}/callback"
-            },
-            "anthropic": {
-                "url": "https://console.anthropic.com/oauth/authorize", 
-                "client_id": "your_anthropic_client_id",
-                "scope": "read",
-                "redirect_uri": f"http://localhost:{self.callback_port}/callback"
-            },
-            "google": {
-                "url": "https://accounts.google.com/o/oauth2/v2/auth",
-                "client_id": "your_google_client_id",
-                "scope": "https://www.googleapis.com/auth/generative-language",
-                "redirect_uri": f"http://localhost:{self.callback_port}/callback"
+        try:
+            return self._auth_urls[provider]
+        except KeyError:
+            raise ValueError(f"Unsupported provider: {provider}")
+    
+    def _build_auth_urls(self) -> Dict[str, str]:
+        """Build every provider's authorization URL once, they only depend on the callback port"""
+        redirect_uri = f"http://localhost:{self.callback_port}/callback"
+        auth_urls = {}
+        for provider, config in OAUTH_PROVIDERS.items():
+            params = {
+                "client_id": config["client_id"],
+                "response_type": "code",
+                "scope": config["scope"],
+                "redirect_uri": redirect_uri,
+                "state": provider  # Include provider in state for verification
             }
-        }
+            auth_urls[provider] = f"{config['url']}?{urlencode(params)}"
+        return auth_urls
+    
+    async def _handle_callback(self, request: "web.Request") -> "web.Response":
+        """Store the authorization code and wake the matching authenticate_user call"""
+        from aiohttp import web
         
-        if provider not in auth_urls:
-            raise ValueError(f"Unsupported provider: {provider}")
+        code = request.query.get("code")
+        state = request.query.get("state")
         
-        config = auth_urls[provider]
-        params = {
-            "client_id": config["client_id"],
-            "response_type": "code",
-            "scope": config["scope"],
-            "redirect_uri": config["redirect_uri"],
-            "state": provider  # Include provider in state for verification
-        }
+        # Only accept codes for a state someone is waiting on, so nothing is left behind
+        pending = self._pending.get(state) if code and state else None
         
-        return f"{config['url']}?{urlencode(params)}"
+        if pending:
+            event, codes = pending
+            codes.append(code)
+            event.set()
+            return web.Response(body=SUCCESS_HTML, content_type="text/html")
+        return web.Response(status=400, body=ERROR_HTML, content_type="text/html")
     
-    def start_callback_server(self):
-        """Start local server to handle OAuth callback"""
-        class CallbackHandler(BaseHTTPRequestHandler):
-            def do_GET(self):
-                if self.path.startswith("/callback"):
-                    # Parse callback parameters
-                    query = urlparse(self.path).query
-                    params = parse_qs(query)
-                    
-                    # Extract authorization code
-                    code = params.get("code", [None])[0]
-                    state = params.get("state", [None])[0]
-                    
-                    if code and state:
-                        # Store the auth code
-                        self.server.auth_codes[state] = code
-                        
-                        # Send success response
-                        self.send_response(200)
-                        self.send_header("Content-type", "text/html")
-                        self.end_headers()
-                        
-                        success_html = """
-                        <html>
-                        <head><title>Authentication Successful</title></head>
-                        <body>
-                        <h1>✅ Authentication Successful!</h1>
-                        <p>You can close this window and return to the application.</p>
-                        <script>window.close();</script>
-                        </body>
-                        </html>
-                        """
-                        self.wfile.write(success_html.encode())
-                    else:
-                        # Send error response
-                        self.send_response(400)
-                        self.send_header("Content-type", "text/html")
-                        self.end_headers()
-                        
-                        error_html = """
-                        <html>
-                        <head><title>Authentication Failed</title></head>
-                        <body>
-                        <h1>❌ Authentication Failed</h1>
-                        <p>Please try again or contact support.</p>
-                        </body>
-                        </html>
-                        """
-                        self.wfile.write(error_html.encode())
-                else:
-                    self.send_response(404)
-                    self.end_headers()
+    async def start_callback_server(self) -> "web.AppRunner":
+        """Start local server to handle OAuth callback on the running loop, reusing it if already running"""
+        if self._runner is None:
+            from aiohttp import web
             
-            def log_message(self, format, *args):
-                # Suppress server logs
-                pass
-        
-        # Create server with auth_codes reference
-        server = HTTPServer(("localhost", self.callback_port), CallbackHandler)
-        server.auth_codes = self.auth_codes
-        
-        # Start server in background thread
-        server_thread = threading.Thread(target=server.serve_forever)
-        server_thread.daemon = True
-        server_thread.start()
-        
-        return server
+            app = web.Application()
+            app.router.add_get("/callback", self._handle_callback)
+            
+            runner = web.AppRunner(app, access_log=None)  # Suppress server logs
+            await runner.setup()
+            await web.TCPSite(runner, "localhost", self.callback_port).start()
+            self._runner = runner
+        return self._runner
     
-    def authenticate_user(self, provider: str) -> Optional[str]:
-        """Authenticate user with AI provider and return access token"""
+    async def close(self):
+        """Stop the callback server"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+    
+    async def authenticate_user_async(self, provider: str) -> Optional[str]:
+        """Authenticate user with AI provider and return access token, sharing the caller's event loop"""
         try:
-            # Start callback server
-            server = self.start_callback_server()
+            # Start callback server (kept alive across calls, callbacks are routed by state)
+            await self.start_callback_server()
+            
+            # Register before opening the browser so a fast callback can't be missed
+            event, codes = self._pending[provider] = (asyncio.Event(), [])
             
-            # Get auth URL and open browser
+            # Get auth URL and open browser (webbrowser.open may block, so keep it off the loop)
             auth_url = self.get_auth_url(provider)
             print(f"🔗 Opening browser for {provider} authentication...")
-            webbrowser.open(auth_url)
+            await asyncio.get_running_loop().run_in_executor(None, webbrowser.open, auth_url)
             
             # Wait for callback
             print("⏳ Waiting for authentication...")
             timeout = 300  # 5 minutes
-            start_time = time.time()
             
-            while time.time() - start_time < timeout:
-                if provider in self.auth_codes:
-                    auth_code = self.auth_codes[provider]
-                    del self.auth_codes[provider]
-                    
-                    # Exchange auth code for access token
-                    access_token = self.exchange_code_for_token(provider, auth_code)
-                    
-                    # Shutdown server
-                    server.shutdown()
-                    
-                    return access_token
-                
-                time.sleep(1)
+            try:
+                await asyncio.wait_for(event.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                print("⏰ Authentication timed out")
+                return None
             
-            # Timeout
-            server.shutdown()
-            print("⏰ Authentication timed out")
-            return None
+            # Exchange auth code for access token
+            return await self.exchange_code_for_token(provider, codes[0])
             
         except Exception as e:
-            logger.error(f"Authentication failed: {e}")
+            logger.error("Authentication failed: %s", e)
             return None
+        finally:
+            self._pending.pop(provider, None)
+    
+    def authenticate_user(self, provider: str) -> Optional[str]:
+        """Authenticate user with AI provider and return access token"""
+        # Runs on a long-lived background loop so the callback server survives between calls
+        future = asyncio.run_coroutine_threadsafe(self.authenticate_user_async(provider), self._background_loop())
+        return future.result()
     
-    def exchange_code_for_token(self, provider: str, auth_code: str) -> Optional[str]:
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop for the sync API, started on a daemon thread on first use"""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="oauth-callback", daemon=True).start()
+                self._loop = loop
+            return self._loop
+    
+    def shutdown(self):
+        """Stop the callback server and background loop started by the sync API"""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+    
+    async def exchange_code_for_token(self, provider: str, auth_code: str) -> Optional[str]:
         """Exchange authorization code for access token"""
         # This would implement the actual token exchange
         # For now, return a placeholder
@@ -347,13 +372,11 @@ class SimplifiedAISetup:
         """Validate API key for the specified provider"""
         # This would implement actual API key validation
         # For now, just check if it looks like a valid key
-        if provider == "openai" and api_key.startswith("sk-"):
-            return True
-        elif provider == "anthropic" and api_key.startswith("sk-ant-"):
-            return True
-        elif provider == "google" and len(api_key) > 20:
-            return True
-        return False
+        rule = API_KEY_RULES.get(provider)
+        if rule is None:
+            return False
+        prefix, min_length = rule
+        return len(api_key) > min_length and api_key.startswith(prefix)
     
     def _save_user_config(self, user_id: str, provider: str, token: str):
         """Save user configuration"""
@@ -362,7 +385,7 @@ class SimplifiedAISetup:
             config_manager = UserConfigManager()
             config_manager.set_ai_provider(user_id, provider, token)
         except Exception as e:
-            logger.error(f"Error saving user config: {e}")
+            logger.error("Error saving user config: %s", e)
             raise
 
 
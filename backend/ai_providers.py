@@ -5,19 +5,77 @@ Allows users to use their own AI accounts (OpenAI, Claude, Google, etc.)
 """
 
 import os
-import json
-import base64
-import requests
+import orjson
+import asyncio
+import io
+import textwrap
 import logging
-from typing import Dict, List, Optional, Any
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Any, Tuple, NamedTuple, TYPE_CHECKING
 from dataclasses import dataclass
-from datetime import datetime, timedelta
 import hashlib
-from cryptography.fernet import Fernet
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Heavy third-party modules are imported where they are first used, so listing providers stays cheap
+if TYPE_CHECKING:
+    import aiohttp
+    import requests
+    from cryptography.fernet import Fernet
+    from PIL import Image
+
+try:
+    import pybase64 as base64
+except ImportError:  # SIMD base64 is optional, the stdlib codec is equivalent
+    import base64
+
+try:
+    import xxhash
+except ImportError:  # Cache keys fall back to blake2b, slower but equally stable
+    xxhash = None
+
+try:
+    import msgpack
+except ImportError:  # Cached results are stored as JSON instead
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # Cached results are stored uncompressed
+    zstandard = None
 
 logger = logging.getLogger(__name__)
 
 
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _pack_result(result: Dict[str, Any]) -> bytes:
+    """Compact on-disk form of an analysis: msgpack (or JSON) optionally zstd-compressed"""
+    data = msgpack.packb(result) if msgpack is not None else orjson.dumps(result)
+    if zstandard is not None:
+        data = zstandard.ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def _unpack_result(data: bytes) -> Dict[str, Any]:
+    """Inverse of _pack_result; the format is detected from the leading bytes"""
+    if data[:4] == ZSTD_MAGIC:
+        data = zstandard.ZstdDecompressor().decompress(data)
+    if data[:1] == b"{":
+        return orjson.loads(data)
+    return msgpack.unpackb(data, raw=False)
+
+
+def _fast_digest(data: bytes) -> str:
+    """Non-cryptographic 128-bit digest for cache keys"""
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
 @dataclass
 class AIProvider:
     """Configuration for an AI provider"""
@@ -32,6 +90,176 @@ class AIProvider:
     pricing_info: str
 
 
+def _build_http_session() -> "requests.Session":
+    """Keep-alive session with pooled connections so provider calls skip repeated TLS handshakes"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50,
+                          max_retries=Retry(total=2, backoff_factor=0.2))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Longest edge sent to vision models; larger photos only add upload time and tokens
+MAX_IMAGE_EDGE = 1024
+# Images this small are sent to OpenAI with "detail": "low"
+LOW_DETAIL_EDGE = 512
+
+# Shared by every provider so the prompt is built once per process
+ANALYZE_PROMPT = textwrap.dedent("""
+    Analyze these images of an item for sale. Provide:
+    1. Item title (max 80 characters)
+    2. Detailed description (2-3 paragraphs)
+    3. Estimated condition (New, Very Good, Good, Fair, Poor)
+    4. Suggested category
+    5. Brand name (if identifiable)
+    6. Material (if identifiable)
+    7. Color description
+    8. Country of origin (if identifiable)
+    9. Estimated market value range
+    10. Key selling points
+    
+    Format as JSON with these exact keys: title, description, condition, category, brand, material, color, country, value_range, selling_points
+    """)
+
+# Bump when ANALYZE_PROMPT or the result format changes so cached analyses are not reused
+PROMPT_VERSION = _fast_digest(f"1:{ANALYZE_PROMPT}".encode())[:16]
+
+# Static request headers; each call only merges in the user's key
+OPENAI_HEADERS = {"Content-Type": "application/json"}
+ANTHROPIC_HEADERS = {"anthropic-version": "2023-06-01", "Content-Type": "application/json"}
+GOOGLE_HEADERS = {"Content-Type": "application/json"}
+
+# Decoding, resizing and base64 release the GIL, so a listing's images are prepared in parallel
+ENCODE_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='image-encode')
+
+
+class EncodedImage(NamedTuple):
+    """A prepared image ready to embed in a provider payload"""
+    data: str
+    long_edge: int
+    phash: Optional[int]
+
+
+def _dhash(image: "Image.Image") -> int:
+    """64-bit difference hash: near-identical photos differ in only a few bits"""
+    from PIL import Image
+    
+    pixels = list(image.convert('L').resize((9, 8), Image.Resampling.BILINEAR).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            bits = (bits << 1) | (left < pixels[row * 9 + col + 1])
+    return bits
+
+
+def _prepare_image(path: str) -> Tuple[bytes, int, Optional[int]]:
+    """Down-sample an image to MAX_IMAGE_EDGE and recompress as JPEG, returning bytes, long edge and hash"""
+    from PIL import Image
+    
+    try:
+        with Image.open(path) as image:
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            image.thumbnail((MAX_IMAGE_EDGE, MAX_IMAGE_EDGE), Image.Resampling.LANCZOS)
+            output = io.BytesIO()
+            image.save(output, format='JPEG', quality=85, optimize=True)
+            return output.getvalue(), max(image.size), _dhash(image)
+    except Exception as e:
+        logger.error("Image preprocessing failed for %s, sending original: %s", path, e)
+        with open(path, "rb") as f:
+            return f.read(), MAX_IMAGE_EDGE, None
+
+
+@lru_cache(maxsize=256)
+def _b64_image(path: str, mtime: float, size: int) -> EncodedImage:
+    """Base64 of a prepared image; mtime and size are part of the key so edited files are re-read"""
+    data, long_edge, phash = _prepare_image(path)
+    return EncodedImage(base64.b64encode(data).decode('ascii'), long_edge, phash)
+
+
+def _encode_image(path: str) -> EncodedImage:
+    """Prepare and base64-encode an image once and reuse it across providers and retries"""
+    st = os.stat(path)
+    return _b64_image(path, st.st_mtime, st.st_size)
+
+
+# Background encodes started by prefetch_images, keyed by path until they finish
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def prefetch_images(images: List[str]):
+    """Start preparing images on ENCODE_POOL without waiting, so a later analysis finds them encoded"""
+    with _inflight_lock:
+        for path in images:
+            if path not in _inflight:
+                future = _inflight[path] = ENCODE_POOL.submit(_encode_image, path)
+                future.add_done_callback(lambda _, p=path: _inflight.pop(p, None))
+
+
+def _encode_or_wait(path: str) -> EncodedImage:
+    """Join a prefetch already running for this path instead of encoding it twice"""
+    pending = _inflight.get(path)
+    return pending.result() if pending is not None else _encode_image(path)
+
+
+def _encode_images(images: List[str]) -> List[EncodedImage]:
+    """Encode all images of a listing concurrently, preserving their order"""
+    if len(images) <= 1:
+        return [_encode_or_wait(path) for path in images]
+    return list(ENCODE_POOL.map(_encode_or_wait, images))
+
+
+def _key_probe(provider_id: str, api_key: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    """URL and headers of the cheap authenticated request used to check a provider key"""
+    # Only the status matters, so list endpoints are asked for a single entry where supported
+    if provider_id == "openai":
+        return "https://api.openai.com/v1/models?limit=1", {"Authorization": f"Bearer {api_key}"}
+    if provider_id == "anthropic":
+        return "https://api.anthropic.com/v1/models?limit=1", {"x-api-key": api_key, "anthropic-version": "2023-06-01"}
+    if provider_id == "google":
+        return f"https://generativelanguage.googleapis.com/v1beta/models?pageSize=1&key={api_key}", {}
+    if provider_id == "local":
+        return f"{api_key}/api/tags", {}
+    return None
+
+
+@lru_cache(maxsize=1)
+def _load_encryption_key() -> bytes:
+    """Get existing encryption key or create new one, touching the key file once per process"""
+    from cryptography.fernet import Fernet
+    
+    key_file = ".encryption_key"
+    if os.path.exists(key_file):
+        with open(key_file, 'rb') as f:
+            return f.read()
+    else:
+        key = Fernet.generate_key()
+        with open(key_file, 'wb') as f:
+            f.write(key)
+        return key
+
+
+@lru_cache(maxsize=1)
+def _get_cipher() -> "Fernet":
+    """Shared Fernet instance for the process-wide key"""
+    from cryptography.fernet import Fernet
+    
+    return Fernet(_load_encryption_key())
+
+
+@lru_cache(maxsize=512)
+def _decrypt_cached(encrypted_key: str) -> str:
+    """Decrypt an API key, skipping Fernet's HMAC + AES work for ciphertexts seen recently"""
+    return _get_cipher().decrypt(encrypted_key.encode()).decode()
+
+
 class AIProviderManager:
     """Manages multiple AI providers and user configurations"""
     
@@ -83,21 +311,34 @@ class AIProviderManager:
             )
         }
         
-        # Initialize encryption key for API keys
-        self.encryption_key = self._get_or_create_encryption_key()
-        self.cipher = Fernet(self.encryption_key)
+        self._http = None
+        self._validators = {
+            "openai": self._test_openai_key,
+            "anthropic": self._test_anthropic_key,
+            "google": self._test_google_key,
+            "local": self._test_local_endpoint,
+        }
+    
+    @property
+    def http(self) -> "requests.Session":
+        """Pooled HTTP session, created on first network call"""
+        if self._http is None:
+            self._http = _build_http_session()
+        return self._http
+    
+    @property
+    def encryption_key(self) -> bytes:
+        """Encryption key for API keys (read once per process)"""
+        return _load_encryption_key()
+    
+    @property
+    def cipher(self) -> "Fernet":
+        """Shared cipher for API keys"""
+        return _get_cipher()
     
     def _get_or_create_encryption_key(self) -> bytes:
         """Get existing encryption key or create new one"""
-        key_file = ".encryption_key"
-        if os.path.exists(key_file):
-            with open(key_file, 'rb') as f:
-                return f.read()
-        else:
-            key = Fernet.generate_key()
-            with open(key_file, 'wb') as f:
-                f.write(key)
-            return key
+        return _load_encryption_key()
     
     def encrypt_api_key(self, api_key: str) -> str:
         """Encrypt API key for secure storage"""
@@ -105,7 +346,7 @@ class AIProviderManager:
     
     def decrypt_api_key(self, encrypted_key: str) -> str:
         """Decrypt API key for use"""
-        return self.cipher.decrypt(encrypted_key.encode()).decode()
+        return _decrypt_cached(encrypted_key)
     
     def get_provider_info(self, provider_id: str) -> Optional[AIProvider]:
         """Get provider configuration"""
@@ -122,53 +363,140 @@ class AIProviderManager:
             if not provider:
                 return False
             
-            if provider_id == "openai":
-                return self._test_openai_key(api_key)
-            elif provider_id == "anthropic":
-                return self._test_anthropic_key(api_key)
-            elif provider_id == "google":
-                return self._test_google_key(api_key)
-            elif provider_id == "local":
-                return self._test_local_endpoint(api_key)
-            
+            validator = self._validators.get(provider_id)
+            return bool(validator and validator(api_key))
+        except Exception as e:
+            logger.error("Error validating API key for %s: %s", provider_id, e)
+            return False
+    
+    async def validate_all(self, keys: Dict[str, str]) -> Dict[str, bool]:
+        """Validate several providers' keys concurrently; wall-clock is the slowest probe, not the sum"""
+        import aiohttp
+        
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=20)) as session:
+            results = await asyncio.gather(
+                *(self._validate_api_key_async(session, provider_id, api_key)
+                  for provider_id, api_key in keys.items())
+            )
+        return dict(zip(keys, results))
+    
+    async def _validate_api_key_async(self, session: "aiohttp.ClientSession",
+                                      provider_id: str, api_key: str) -> bool:
+        """Async counterpart of validate_api_key sharing the caller's session"""
+        probe = _key_probe(provider_id, api_key)
+        if probe is None or not self.get_provider_info(provider_id):
             return False
+        url, headers = probe
+        import aiohttp
+        
+        try:
+            timeout = aiohttp.ClientTimeout(total=5 if provider_id == "local" else 30)
+            async with session.get(url, headers=headers, timeout=timeout) as response:
+                return response.status == 200
         except Exception as e:
-            logger.error(f"Error validating API key for {provider_id}: {e}")
+            logger.error("Error validating API key for %s: %s", provider_id, e)
             return False
     
     def _test_openai_key(self, api_key: str) -> bool:
         """Test OpenAI API key"""
-        headers = {"Authorization": f"Bearer {api_key}"}
-        response = requests.get("https://api.openai.com/v1/models", headers=headers)
+        url, headers = _key_probe("openai", api_key)
+        response = self.http.get(url, headers=headers)
         return response.status_code == 200
     
     def _test_anthropic_key(self, api_key: str) -> bool:
         """Test Anthropic API key"""
-        headers = {"x-api-key": api_key, "anthropic-version": "2023-06-01"}
-        response = requests.get("https://api.anthropic.com/v1/models", headers=headers)
+        url, headers = _key_probe("anthropic", api_key)
+        response = self.http.get(url, headers=headers)
         return response.status_code == 200
     
     def _test_google_key(self, api_key: str) -> bool:
         """Test Google API key"""
-        url = f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}"
-        response = requests.get(url)
+        url, _ = _key_probe("google", api_key)
+        response = self.http.get(url)
         return response.status_code == 200
     
     def _test_local_endpoint(self, endpoint: str) -> bool:
         """Test local Ollama endpoint"""
         try:
-            response = requests.get(f"{endpoint}/api/tags", timeout=5)
+            url, _ = _key_probe("local", endpoint)
+            response = self.http.get(url, timeout=5)
             return response.status_code == 200
         except:
             return False
 
 
+class RateLimiter:
+    """Token bucket that spaces calls to at most rate_per_minute, blocking the caller until a slot frees"""
+    
+    def __init__(self, rate_per_minute: int):
+        self.capacity = max(1, rate_per_minute)
+        self.refill_per_second = self.capacity / 60.0
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Take one token, sleeping until one is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.refill_per_second
+            time.sleep(wait)
+
+
 class AIService:
     """Main AI service that routes requests to user's chosen provider"""
     
+    # Attempts for a provider call answered with 429 Too Many Requests
+    MAX_RATE_LIMIT_RETRIES = 3
+    
     def __init__(self):
         self.provider_manager = AIProviderManager()
-        self.usage_tracker = UsageTracker()
+        self.usage_tracker = UsageTracker(self.provider_manager)
+        self.response_cache = ResponseCache()
+        # One token bucket per (user, provider), sized from the provider's rate_limit_per_minute
+        self._limiters: Dict[Tuple[str, str], RateLimiter] = {}
+        self._limiters_lock = threading.Lock()
+        self._analyzers = {
+            "openai": self._analyze_with_openai,
+            "anthropic": self._analyze_with_anthropic,
+            "google": self._analyze_with_google,
+            "local": self._analyze_with_local,
+        }
+    
+    @property
+    def http(self) -> "requests.Session":
+        """Share the manager's pooled connections for analysis calls"""
+        return self.provider_manager.http
+    
+    def _limiter(self, user_id: str, provider_id: str) -> RateLimiter:
+        """Get or create the rate limiter for a user's provider"""
+        key = (user_id, provider_id)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            with self._limiters_lock:
+                limiter = self._limiters.get(key)
+                if limiter is None:
+                    provider = self.provider_manager.get_provider_info(provider_id)
+                    limiter = self._limiters[key] = RateLimiter(provider.rate_limit_per_minute if provider else 1)
+        return limiter
+    
+    def _post(self, url: str, **kwargs) -> "requests.Response":
+        """POST to a provider, backing off on 429 and honoring Retry-After"""
+        for attempt in range(self.MAX_RATE_LIMIT_RETRIES):
+            response = self.http.post(url, **kwargs)
+            if response.status_code != 429:
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else 2 ** attempt
+            logger.warning("Rate limited by %s, retrying in %.1fs", url, delay)
+            time.sleep(delay)
+        return self.http.post(url, **kwargs)
     
     def analyze_item_images(self, images: List[str], user_config: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze item images using user's chosen AI provider"""
@@ -183,57 +511,43 @@ class AIService:
             raise Exception("Daily usage limit exceeded")
         
         try:
-            api_key = self.provider_manager.decrypt_api_key(encrypted_api_key)
+            # This user already had the same photos analyzed: skip the provider round-trip
+            user_id = user_config.get("user_id")
+            encoded = _encode_images(images)
+            cached = self.response_cache.get(user_id, provider_id, encoded)
+            if cached is not None:
+                return cached
             
-            if provider_id == "openai":
-                return self._analyze_with_openai(images, api_key)
-            elif provider_id == "anthropic":
-                return self._analyze_with_anthropic(images, api_key)
-            elif provider_id == "google":
-                return self._analyze_with_google(images, api_key)
-            elif provider_id == "local":
-                return self._analyze_with_local(images, api_key)
-            else:
+            analyzer = self._analyzers.get(provider_id)
+            if analyzer is None:
                 raise ValueError(f"Unsupported AI provider: {provider_id}")
+            
+            api_key = self.provider_manager.decrypt_api_key(encrypted_api_key)
+            self._limiter(user_id, provider_id).acquire()
+            
+            result = analyzer(images, api_key)
+            self.response_cache.put(user_id, provider_id, encoded, result)
+            return result
                 
         except Exception as e:
-            logger.error(f"AI analysis failed: {e}")
+            logger.error("AI analysis failed: %s", e)
             raise
     
     def _analyze_with_openai(self, images: List[str], api_key: str) -> Dict[str, Any]:
         """Analyze images using OpenAI GPT-4 Vision"""
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
+        headers = {**OPENAI_HEADERS, "Authorization": f"Bearer {api_key}"}
         
         # Convert images to base64
-        image_data = []
-        for image_path in images:
-            with open(image_path, "rb") as f:
-                image_base64 = base64.b64encode(f.read()).decode()
-                image_data.append({
-                    "type": "image_url",
-                    "image_url": {
-                        "url": f"data:image/jpeg;base64,{image_base64}"
-                    }
-                })
-        
-        prompt = """
-        Analyze these images of an item for sale. Provide:
-        1. Item title (max 80 characters)
-        2. Detailed description (2-3 paragraphs)
-        3. Estimated condition (New, Very Good, Good, Fair, Poor)
-        4. Suggested category
-        5. Brand name (if identifiable)
-        6. Material (if identifiable)
-        7. Color description
-        8. Country of origin (if identifiable)
-        9. Estimated market value range
-        10. Key selling points
-        
-        Format as JSON with these exact keys: title, description, condition, category, brand, material, color, country, value_range, selling_points
-        """
+        image_data = [
+            {
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:image/jpeg;base64,{image.data}",
+                    "detail": "low" if image.long_edge <= LOW_DETAIL_EDGE else "auto"
+                }
+            }
+            for image in _encode_images(images)
+        ]
         
         payload = {
             "model": "gpt-4-vision-preview",
@@ -241,7 +555,7 @@ class AIService:
                 {
                     "role": "user",
                     "content": [
-                        {"type": "text", "text": prompt},
+                        {"type": "text", "text": ANALYZE_PROMPT},
                         *image_data
                     ]
                 }
@@ -249,62 +563,41 @@ class AIService:
             "max_tokens": 1000
         }
         
-        response = requests.post(
+        response = self._post(
             "https://api.openai.com/v1/chat/completions",
             headers=headers,
-            json=payload
+            data=orjson.dumps(payload)
         )
         
         if response.status_code != 200:
             raise Exception(f"OpenAI API error: {response.text}")
         
-        result = response.json()
+        result = orjson.loads(response.content)
         content = result["choices"][0]["message"]["content"]
         
         # Parse JSON response
         try:
-            return json.loads(content)
-        except json.JSONDecodeError:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
             # Fallback: extract information from text
             return self._parse_text_response(content)
     
     def _analyze_with_anthropic(self, images: List[str], api_key: str) -> Dict[str, Any]:
         """Analyze images using Anthropic Claude 3 Vision"""
-        headers = {
-            "x-api-key": api_key,
-            "anthropic-version": "2023-06-01",
-            "Content-Type": "application/json"
-        }
+        headers = {**ANTHROPIC_HEADERS, "x-api-key": api_key}
         
         # Convert images to base64
-        image_data = []
-        for image_path in images:
-            with open(image_path, "rb") as f:
-                image_base64 = base64.b64encode(f.read()).decode()
-                image_data.append({
-                    "type": "image",
-                    "source": {
-                        "type": "base64",
-                        "media_type": "image/jpeg",
-                        "data": image_base64
-                    }
-                })
-        
-        prompt = """
-        Analyze these images of an item for sale. Provide:
-        1. Item title (max 80 characters)
-        2. Detailed description (2-3 paragraphs)
-        3. Estimated condition (New, Very Good, Good, Fair, Poor)
-        4. Suggested category
-        5. Brand name (if identifiable)
-        6. Material (if identifiable)
-        7. Color description
-        8. Country of origin (if identifiable)
-        9. Estimated market value range
-        10. Key selling points
-        
-        Format as JSON with these exact keys: title, description, condition, category, brand, material, color, country, value_range, selling_points
-        """
+        image_data = [
+            {
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": "image/jpeg",
+                    "data": image.data
+                }
+            }
+            for image in _encode_images(images)
+        ]
         
         payload = {
             "model": "claude-3-sonnet-20240229",
@@ -313,62 +606,42 @@ class AIService:
                 {
                     "role": "user",
                     "content": [
-                        {"type": "text", "text": prompt},
+                        {"type": "text", "text": ANALYZE_PROMPT},
                         *image_data
                     ]
                 }
             ]
         }
         
-        response = requests.post(
+        response = self._post(
             "https://api.anthropic.com/v1/messages",
             headers=headers,
-            json=payload
+            data=orjson.dumps(payload)
         )
         
         if response.status_code != 200:
             raise Exception(f"Anthropic API error: {response.text}")
         
-        result = response.json()
+        result = orjson.loads(response.content)
         content = result["content"][0]["text"]
         
         try:
-            return json.loads(content)
-        except json.JSONDecodeError:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
             return self._parse_text_response(content)
     
     def _analyze_with_google(self, images: List[str], api_key: str) -> Dict[str, Any]:
         """Analyze images using Google Gemini Vision"""
         # Convert images to base64
-        image_data = []
-        for image_path in images:
-            with open(image_path, "rb") as f:
-                image_base64 = base64.b64encode(f.read()).decode()
-                image_data.append({
-                    "mime_type": "image/jpeg",
-                    "data": image_base64
-                })
-        
-        prompt = """
-        Analyze these images of an item for sale. Provide:
-        1. Item title (max 80 characters)
-        2. Detailed description (2-3 paragraphs)
-        3. Estimated condition (New, Very Good, Good, Fair, Poor)
-        4. Suggested category
-        5. Brand name (if identifiable)
-        6. Material (if identifiable)
-        7. Color description
-        8. Country of origin (if identifiable)
-        9. Estimated market value range
-        10. Key selling points
-        
-        Format as JSON with these exact keys: title, description, condition, category, brand, material, color, country, value_range, selling_points
-        """
+        image_data = [
+            {"mime_type": "image/jpeg", "data": image.data}
+            for image in _encode_images(images)
+        ]
         
         payload = {
             "contents": [{
                 "parts": [
-                    {"text": prompt},
+                    {"text": ANALYZE_PROMPT},
                     *[{"inline_data": img} for img in image_data]
                 ]
             }],
@@ -378,17 +651,17 @@ class AIService:
         }
         
         url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-pro-vision:generateContent?key={api_key}"
-        response = requests.post(url, json=payload)
+        response = self._post(url, data=orjson.dumps(payload), headers=GOOGLE_HEADERS)
         
         if response.status_code != 200:
             raise Exception(f"Google API error: {response.text}")
         
-        result = response.json()
+        result = orjson.loads(response.content)
         content = result["candidates"][0]["content"]["parts"][0]["text"]
         
         try:
-            return json.loads(content)
-        except json.JSONDecodeError:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
             return self._parse_text_response(content)
     
     def _analyze_with_local(self, images: List[str], endpoint: str) -> Dict[str, Any]:
@@ -425,38 +698,75 @@ class AIService:
         }
 
 
+# (local midnight when it expires, "%Y-%m-%d" day string), swapped as one tuple so readers never see a mix
+_day_cache: Tuple[float, str] = (0.0, "")
+
+
+def _today() -> str:
+    """Local date string for usage keys, formatted once per day instead of per request"""
+    global _day_cache
+    now = time.time()
+    if now >= _day_cache[0]:
+        lt = time.localtime(now)
+        midnight = time.mktime((lt.tm_year, lt.tm_mon, lt.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+        _day_cache = (midnight, time.strftime("%Y-%m-%d", lt))
+    return _day_cache[1]
+
+
 class UsageTracker:
     """Track user usage for rate limiting"""
     
-    def __init__(self):
-        self.usage_file = "ai_usage.json"
-        self.usage_data = self._load_usage_data()
-    
-    def _load_usage_data(self) -> Dict[str, Any]:
-        """Load usage data from file"""
-        if os.path.exists(self.usage_file):
-            try:
-                with open(self.usage_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
-    
-    def _save_usage_data(self):
-        """Save usage data to file"""
-        with open(self.usage_file, 'w') as f:
-            json.dump(self.usage_data, f, indent=2)
+    def __init__(self, provider_manager: Optional[AIProviderManager] = None, db_path: str = "ai_usage.db",
+                 legacy_path: str = "ai_usage.json"):
+        self.provider_manager = provider_manager or AIProviderManager()
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # Autocommit + WAL: each increment is one atomic statement and readers never block the writer
+        self.db = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS usage (key TEXT PRIMARY KEY, cnt INTEGER NOT NULL)")
+        self._import_legacy_usage(legacy_path)
+    
+    def _import_legacy_usage(self, legacy_path: str):
+        """Carry counts over from the old JSON usage file so existing limits aren't reset"""
+        if not os.path.exists(legacy_path):
+            return
+        try:
+            with open(legacy_path, "rb") as f:
+                usage_data = orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError) as e:
+            logger.error("Could not import usage from %s: %s", legacy_path, e)
+            return
+        rows = [(key, int(count)) for key, count in usage_data.items() if isinstance(count, (int, float))]
+        with self._lock:
+            # MAX keeps the import idempotent if the rename below fails and it runs again
+            self.db.executemany(
+                "INSERT INTO usage (key, cnt) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET cnt = MAX(cnt, excluded.cnt)",
+                rows
+            )
+        try:
+            os.replace(legacy_path, f"{legacy_path}.imported")
+        except OSError as e:
+            logger.warning("Imported %s but could not rename it: %s", legacy_path, e)
+        logger.info("Imported %d usage counters from %s", len(rows), legacy_path)
+    
+    def _get_count(self, key: str) -> int:
+        """Current usage count for a user/provider/day key"""
+        with self._lock:
+            row = self.db.execute("SELECT cnt FROM usage WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
     
     def check_limits(self, user_id: str, provider_id: str) -> bool:
         """Check if user has remaining usage"""
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = _today()
         key = f"{user_id}_{provider_id}_{today}"
         
-        current_usage = self.usage_data.get(key, 0)
+        current_usage = self._get_count(key)
         
         # Get provider limits
-        provider_manager = AIProviderManager()
-        provider = provider_manager.get_provider_info(provider_id)
+        provider = self.provider_manager.get_provider_info(provider_id)
         
         if not provider:
             return False
@@ -465,21 +775,24 @@ class UsageTracker:
     
     def record_usage(self, user_id: str, provider_id: str):
         """Record API usage"""
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = _today()
         key = f"{user_id}_{provider_id}_{today}"
         
-        self.usage_data[key] = self.usage_data.get(key, 0) + 1
-        self._save_usage_data()
+        with self._lock:
+            self.db.execute(
+                "INSERT INTO usage (key, cnt) VALUES (?, 1) "
+                "ON CONFLICT(key) DO UPDATE SET cnt = cnt + 1",
+                (key,)
+            )
     
     def get_usage_stats(self, user_id: str, provider_id: str) -> Dict[str, Any]:
         """Get usage statistics for user"""
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = _today()
         key = f"{user_id}_{provider_id}_{today}"
         
-        current_usage = self.usage_data.get(key, 0)
+        current_usage = self._get_count(key)
         
-        provider_manager = AIProviderManager()
-        provider = provider_manager.get_provider_info(provider_id)
+        provider = self.provider_manager.get_provider_info(provider_id)
         
         if not provider:
             return {"error": "Provider not found"}
@@ -492,6 +805,99 @@ class UsageTracker:
         }
 
 
+class ResponseCache:
+    """Reuse a user's prior analyses for the same image set.
+
+    Entries are scoped to the user and keyed by the content of the prepared images. Matching
+    perceptually similar photos is opt-in (AI_CACHE_NEAR_DUPLICATE_BITS), since different items
+    shot against the same background can hash close together.
+    """
+    
+    TTL_SECONDS = 30 * 24 * 3600
+    # Recent entries of the same user scanned for a near-duplicate match
+    SCAN_LIMIT = 500
+    
+    def __init__(self, db_path: str = "ai_cache.db", near_duplicate_bits: Optional[int] = None):
+        self.db_path = db_path
+        # Max differing dHash bits per image (of 64) for photos to count as the same item; 0 disables
+        if near_duplicate_bits is None:
+            near_duplicate_bits = int(os.getenv("AI_CACHE_NEAR_DUPLICATE_BITS", 0))
+        self.near_duplicate_bits = near_duplicate_bits
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        # Entries of the earlier layout were shared across users, so they are not carried over
+        self.db.execute("DROP TABLE IF EXISTS responses")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS analyses ("
+            "key TEXT PRIMARY KEY, user_id TEXT NOT NULL, provider TEXT NOT NULL, hashes TEXT, "
+            "result BLOB NOT NULL, created REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS analyses_user ON analyses (user_id, provider, created)")
+    
+    @staticmethod
+    def _key(user_id: str, provider_id: str, images: List[EncodedImage]) -> str:
+        """Exact-match key over user, provider, prompt version and the prepared image bytes"""
+        raw = "|".join([user_id, provider_id, PROMPT_VERSION, *(_fast_digest(image.data.encode('ascii')) for image in images)])
+        return _fast_digest(raw.encode())
+    
+    @staticmethod
+    def _packed_hashes(images: List[EncodedImage]) -> Optional[str]:
+        """Perceptual hashes stored for near-duplicate lookups, None if any image has none"""
+        if any(image.phash is None for image in images):
+            return None
+        return f"{PROMPT_VERSION}:" + ",".join(f"{image.phash:016x}" for image in images)
+    
+    def get(self, user_id: str, provider_id: str, images: List[EncodedImage]) -> Optional[Dict[str, Any]]:
+        """Return this user's cached analysis for these images, or None"""
+        if not user_id or not images:
+            return None
+        cutoff = time.time() - self.TTL_SECONDS
+        with self._lock:
+            row = self.db.execute(
+                "SELECT result FROM analyses WHERE key = ? AND created > ?",
+                (self._key(user_id, provider_id, images), cutoff)
+            ).fetchone()
+            if row is None and self.near_duplicate_bits > 0 and self._packed_hashes(images) is not None:
+                rows = self.db.execute(
+                    "SELECT hashes, result FROM analyses WHERE user_id = ? AND provider = ? AND created > ? "
+                    "AND hashes IS NOT NULL ORDER BY created DESC LIMIT ?",
+                    (user_id, provider_id, cutoff, self.SCAN_LIMIT)
+                ).fetchall()
+                row = next((r[1:] for r in rows if self._is_similar(images, r[0])), None)
+        if row is None:
+            return None
+        try:
+            return _unpack_result(row[0])
+        except Exception as e:
+            # Written with an optional codec this process lacks; treat as a miss
+            logger.warning("Unreadable cached analysis: %s", e)
+            return None
+    
+    def put(self, user_id: str, provider_id: str, images: List[EncodedImage], result: Dict[str, Any]):
+        """Store an analysis result for this user's images"""
+        if not user_id or not images:
+            return
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO analyses (key, user_id, provider, hashes, result, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self._key(user_id, provider_id, images), user_id, provider_id,
+                 self._packed_hashes(images), _pack_result(result), time.time())
+            )
+    
+    def _is_similar(self, images: List[EncodedImage], stored: str) -> bool:
+        """Whether a stored hash list is the same prompt and image-by-image within near_duplicate_bits"""
+        version, _, packed = stored.partition(":")
+        if version != PROMPT_VERSION:
+            return False
+        other = [int(h, 16) for h in packed.split(",")]
+        return len(other) == len(images) and all(
+            bin(image.phash ^ h).count("1") <= self.near_duplicate_bits for image, h in zip(images, other)
+        )
+
+
 # Example usage
 if __name__ == "__main__":
     # Initialize AI service
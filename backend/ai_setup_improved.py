@@ -6,83 +6,154 @@ Focuses on clear guidance and easy API key management
 """
 
 import os
-import json
-import webbrowser
-import logging
+import sys
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict, Optional, Any
 from user_config import UserConfigManager
 
-logger = logging.getLogger(__name__)
+# API key format rules per provider: (required prefix, length the key must exceed)
+KEY_FORMAT_RULES = {
+    "openai": ("sk-", 20),
+    "anthropic": ("sk-ant-", 20),
+    "google": ("", 20),  # Google API keys are typically long
+}
+CUSTOM_PROVIDER_KEY_RULE = ("", 10)  # Basic validation for custom providers
+
+# Real provider information, shared read-only by every ImprovedAISetup
+PROVIDERS = MappingProxyType({
+    "openai": {
+        "name": "OpenAI GPT-4 Vision",
+        "description": "Best for detailed image analysis and creative descriptions",
+        "setup_url": "https://platform.openai.com/api-keys",
+        "pricing": "~$0.01-0.03 per image analysis",
+        "free_tier": "No free tier, but very affordable",
+        "features": ["High accuracy", "Creative descriptions", "Fast processing"]
+    },
+    "anthropic": {
+        "name": "Claude 3 Vision",
+        "description": "Excellent for detailed analysis and safety-focused content",
+        "setup_url": "https://console.anthropic.com/",
+        "pricing": "~$0.015 per image analysis",
+        "free_tier": "No free tier, but competitive pricing",
+        "features": ["Detailed analysis", "Safety-focused", "Reliable"]
+    },
+    "google": {
+        "name": "Google Gemini Vision",
+        "description": "Good balance of speed and accuracy with generous free tier",
+        "setup_url": "https://makersuite.google.com/app/apikey",
+        "pricing": "Free tier: 15 requests/minute, then ~$0.0025 per request",
+        "free_tier": "15 requests/minute, 1500 requests/day",
+        "features": ["Generous free tier", "Fast processing", "Good accuracy"]
+    }
+})
+
+# Setup-wizard text shown by the CLI only; kept out of PROVIDERS, which is also served by the API
+CLI_PROVIDER_TEXT = MappingProxyType({
+    "openai": {
+        "tips": (
+            "• Look for 'Create new secret key' button\n"
+            "• Copy the key immediately (you won't see it again)\n"
+            "• Keep your key secure and don't share it\n"
+        ),
+        "free_tier_note": "charges per request.\nMonitor your usage to control costs.",
+    },
+    "anthropic": {
+        "tips": (
+            "• Sign in to your Anthropic account\n"
+            "• Navigate to API Keys section\n"
+            "• Create a new API key\n"
+        ),
+        "free_tier_note": "charges per request.\nMonitor your usage to control costs.",
+    },
+    "google": {
+        "tips": (
+            "• Sign in with your Google account\n"
+            "• Click 'Create API Key'\n"
+            "• Copy the generated key\n"
+        ),
+        "free_tier_note": "has a generous free tier.\nYou can start using it immediately without worrying about costs.",
+    },
+})
+
+
+@lru_cache(maxsize=1)
+def _default_config_manager() -> UserConfigManager:
+    """Config manager shared by every ImprovedAISetup that isn't handed one"""
+    return UserConfigManager()
+
+
+@lru_cache(maxsize=1)
+def _rendered_comparison() -> str:
+    """Provider comparison text; PROVIDERS is read-only, so it is rendered once per process"""
+    lines = ["\n📊 AI Provider Comparison", "=" * 60]
+    
+    for info in PROVIDERS.values():
+        lines += [
+            f"\n🤖 {info['name']}",
+            f"   📝 {info['description']}",
+            f"   💰 Pricing: {info['pricing']}",
+            f"   🆓 Free Tier: {info['free_tier']}",
+            f"   ✨ Features: {', '.join(info['features'])}",
+            f"   🔗 Setup: {info['setup_url']}",
+        ]
+    
+    return "\n".join(lines) + "\n"
 
 
 class ImprovedAISetup:
     """Realistic AI setup with clear guidance and user-friendly experience"""
     
-    def __init__(self):
-        self.config_manager = UserConfigManager()
-        
-        # Real provider information
-        self.providers = {
-            "openai": {
-                "name": "OpenAI GPT-4 Vision",
-                "description": "Best for detailed image analysis and creative descriptions",
-                "setup_url": "https://platform.openai.com/api-keys",
-                "pricing": "~$0.01-0.03 per image analysis",
-                "free_tier": "No free tier, but very affordable",
-                "features": ["High accuracy", "Creative descriptions", "Fast processing"]
-            },
-            "anthropic": {
-                "name": "Claude 3 Vision",
-                "description": "Excellent for detailed analysis and safety-focused content",
-                "setup_url": "https://console.anthropic.com/",
-                "pricing": "~$0.015 per image analysis",
-                "free_tier": "No free tier, but competitive pricing",
-                "features": ["Detailed analysis", "Safety-focused", "Reliable"]
-            },
-            "google": {
-                "name": "Google Gemini Vision",
-                "description": "Good balance of speed and accuracy with generous free tier",
-                "setup_url": "https://makersuite.google.com/app/apikey",
-                "pricing": "Free tier: 15 requests/minute, then ~$0.0025 per request",
-                "free_tier": "15 requests/minute, 1500 requests/day",
-                "features": ["Generous free tier", "Fast processing", "Good accuracy"]
-            }
-        }
+    providers = PROVIDERS
+    
+    def __init__(self, config_manager: Optional[UserConfigManager] = None):
+        self.config_manager = config_manager or _default_config_manager()
     
     def setup_ai_provider(self, user_id: str) -> bool:
         """Interactive AI provider setup with realistic guidance"""
-        print(f"\n🤖 AI Provider Setup for User: {user_id}")
-        print("=" * 60)
+        provider_ids = tuple(self.providers)
+        n = len(provider_ids)
+        manual_opt, skip_opt, back_opt = n + 1, n + 2, n + 3
+        prompt = f"\nSelect option (1-{back_opt}): "
         
-        print("\n💡 Choose your AI provider for image analysis and listing enhancement:")
-        print("Each provider has different strengths and pricing.")
+        # Build the whole menu and write it in one go
+        lines = [
+            f"\n🤖 AI Provider Setup for User: {user_id}",
+            "=" * 60,
+            "\n💡 Choose your AI provider for image analysis and listing enhancement:",
+            "Each provider has different strengths and pricing.",
+        ]
         
         # Show provider options with details
-        for i, (provider_id, info) in enumerate(self.providers.items(), 1):
-            print(f"\n{i}. {info['name']}")
-            print(f"   📝 {info['description']}")
-            print(f"   💰 {info['pricing']}")
-            print(f"   🆓 {info['free_tier']}")
-            print(f"   ✨ Features: {', '.join(info['features'])}")
+        for i, info in enumerate(self.providers.values(), 1):
+            lines += [
+                f"\n{i}. {info['name']}",
+                f"   📝 {info['description']}",
+                f"   💰 {info['pricing']}",
+                f"   🆓 {info['free_tier']}",
+                f"   ✨ Features: {', '.join(info['features'])}",
+            ]
         
-        print(f"\n{len(self.providers) + 1}. Manual API Key Setup (Advanced)")
-        print(f"{len(self.providers) + 2}. Skip AI setup for now")
-        print(f"{len(self.providers) + 3}. Go back to main menu")
+        lines += [
+            f"\n{manual_opt}. Manual API Key Setup (Advanced)",
+            f"{skip_opt}. Skip AI setup for now",
+            f"{back_opt}. Go back to main menu",
+        ]
+        sys.stdout.write("\n".join(lines) + "\n")
         
         while True:
-            choice = input(f"\nSelect option (1-{len(self.providers) + 3}): ").strip()
+            choice = input(prompt).strip()
             
             if choice.isdigit():
                 choice_num = int(choice)
-                if 1 <= choice_num <= len(self.providers):
-                    provider_id = list(self.providers.keys())[choice_num - 1]
-                    return self._setup_specific_provider(user_id, provider_id)
-                elif choice_num == len(self.providers) + 1:
+                if 1 <= choice_num <= n:
+                    return self._setup_specific_provider(user_id, provider_ids[choice_num - 1])
+                elif choice_num == manual_opt:
                     return self._setup_manual_api_key(user_id)
-                elif choice_num == len(self.providers) + 2:
+                elif choice_num == skip_opt:
                     print("✅ Skipping AI setup. You can configure it later.")
                     return True
-                elif choice_num == len(self.providers) + 3:
+                elif choice_num == back_opt:
                     print("↩️  Going back to main menu...")
                     return False
             
@@ -92,41 +163,30 @@ class ImprovedAISetup:
         """Setup a specific AI provider with guided assistance"""
         provider = self.providers[provider_id]
         
-        print(f"\n🔧 Setting up {provider['name']}")
-        print("=" * 50)
-        
-        print(f"\n📋 Setup Steps:")
-        print("1. Visit the provider's website")
-        print("2. Create an account (if needed)")
-        print("3. Generate an API key")
-        print("4. Copy the API key to this application")
-        
-        print(f"\n🌐 Get your API key from:")
-        print(f"   {provider['setup_url']}")
+        sys.stdout.write(
+            f"\n🔧 Setting up {provider['name']}\n"
+            f"{'=' * 50}\n"
+            "\n📋 Setup Steps:\n"
+            "1. Visit the provider's website\n"
+            "2. Create an account (if needed)\n"
+            "3. Generate an API key\n"
+            "4. Copy the API key to this application\n"
+            "\n🌐 Get your API key from:\n"
+            f"   {provider['setup_url']}\n"
+        )
         
         # Offer to open browser
         open_browser = input(f"\nWould you like to open {provider['name']} in your browser? (y/n): ").strip().lower()
         if open_browser in ['y', 'yes']:
             try:
+                import webbrowser  # Only needed on this path, and costly to import
                 webbrowser.open(provider['setup_url'])
                 print("✅ Browser opened! Please get your API key.")
             except Exception as e:
                 print(f"⚠️  Could not open browser: {e}")
                 print(f"Please manually visit: {provider['setup_url']}")
         
-        print(f"\n💡 Tips for {provider['name']}:")
-        if provider_id == "openai":
-            print("• Look for 'Create new secret key' button")
-            print("• Copy the key immediately (you won't see it again)")
-            print("• Keep your key secure and don't share it")
-        elif provider_id == "anthropic":
-            print("• Sign in to your Anthropic account")
-            print("• Navigate to API Keys section")
-            print("• Create a new API key")
-        elif provider_id == "google":
-            print("• Sign in with your Google account")
-            print("• Click 'Create API Key'")
-            print("• Copy the generated key")
+        sys.stdout.write(f"\n💡 Tips for {provider['name']}:\n{CLI_PROVIDER_TEXT[provider_id]['tips']}")
         
         # Get API key with validation
         while True:
@@ -205,14 +265,11 @@ class ImprovedAISetup:
     
     def _validate_api_key_format(self, provider_id: str, api_key: str) -> bool:
         """Validate API key format for different providers"""
-        if provider_id == "openai":
-            return api_key.startswith("sk-") and len(api_key) > 20
-        elif provider_id == "anthropic":
-            return api_key.startswith("sk-ant-") and len(api_key) > 20
-        elif provider_id == "google":
-            return len(api_key) > 20  # Google API keys are typically long
-        else:
-            return len(api_key) > 10  # Basic validation for custom providers
+        prefix, min_length = KEY_FORMAT_RULES.get(provider_id, CUSTOM_PROVIDER_KEY_RULE)
+        if len(api_key) <= min_length:
+            return False
+        # Prefix-free rules (google, custom) never pay for a startswith call
+        return not prefix or api_key.startswith(prefix)
     
     def _show_next_steps(self, provider_id: str):
         """Show next steps after successful setup"""
@@ -222,25 +279,12 @@ class ImprovedAISetup:
         print("2. Test your configuration")
         print("3. Start creating AI-enhanced listings!")
         
-        if provider_id == "google":
-            print(f"\n💡 Note: {self.providers[provider_id]['name']} has a generous free tier.")
-            print("You can start using it immediately without worrying about costs.")
-        else:
-            print(f"\n💡 Note: {self.providers[provider_id]['name']} charges per request.")
-            print("Monitor your usage to control costs.")
+        provider = self.providers[provider_id]
+        print(f"\n💡 Note: {provider['name']} {CLI_PROVIDER_TEXT[provider_id]['free_tier_note']}")
     
     def show_provider_comparison(self):
         """Show detailed provider comparison"""
-        print("\n📊 AI Provider Comparison")
-        print("=" * 60)
-        
-        for provider_id, info in self.providers.items():
-            print(f"\n🤖 {info['name']}")
-            print(f"   📝 {info['description']}")
-            print(f"   💰 Pricing: {info['pricing']}")
-            print(f"   🆓 Free Tier: {info['free_tier']}")
-            print(f"   ✨ Features: {', '.join(info['features'])}")
-            print(f"   🔗 Setup: {info['setup_url']}")
+        sys.stdout.write(_rendered_comparison())
     
     def test_ai_connection(self, user_id: str) -> bool:
         """Test AI provider connection"""
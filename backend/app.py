@@ -4,13 +4,40 @@ Flask API Server for PictoPost eBay Lister
 Provides REST API endpoints for the frontend to interact with the Python backend
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, send_from_directory
 from flask_cors import CORS
+from flask_compress import Compress
+from flask_orjson import OrjsonProvider
+from werkzeug.utils import secure_filename
+import io
 import os
-import json
+import contextlib
+import gzip
+import shutil
+import hashlib
+import time
 import logging
+import orjson
+import msgspec
 from datetime import datetime
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:  # msgpack responses are opt-in, JSON is always available
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # Fall back to gzip-only precompression
+    brotli = None
+
+try:
+    import gevent
+    from gevent import monkey as gevent_monkey
+except ImportError:  # Plain threaded servers run blocking IO inline
+    gevent = None
 
 # Import our existing modules
 from user_config import UserConfigManager
@@ -18,201 +45,418 @@ from ai_providers import AIProviderManager
 from ai_setup_improved import ImprovedAISetup
 from ebay_lister import EbayLister
 from listing_generator import ListingGenerator
+from draft_store import DraftStore
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+# LOG_LEVEL=WARNING in production skips INFO records before any formatting happens
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend integration
+# Route any remaining flask.json use (jsonify, request.get_json, error pages) through orjson
+app.json = OrjsonProvider(app)
+# Compress dynamic API bodies on the fly; precompressed responses already carry
+# Content-Encoding and are passed through untouched. Level 5 / br 4 trade little size for much less CPU.
+app.config.update(
+    COMPRESS_MIMETYPES=['application/json', 'application/msgpack'],
+    COMPRESS_ALGORITHM=['br', 'gzip'],
+    COMPRESS_LEVEL=5,
+    COMPRESS_BR_LEVEL=4,
+    COMPRESS_MIN_SIZE=500,
+)
+Compress(app)
+# Frontend origins allowed to call the API; override with a comma-separated CORS_ORIGINS
+CORS_ORIGINS = [o.strip() for o in os.getenv('CORS_ORIGINS', 'http://localhost:8080,http://127.0.0.1:8080').split(',') if o.strip()]
+# Scope CORS to the JSON API; images load via <img> and skip the header work entirely.
+# max_age lets browsers cache the preflight for a day instead of repeating it per request.
+CORS(app, resources={r"/api/(?!images/).*": {"origins": CORS_ORIGINS}}, max_age=86400)
 
 # Initialize managers
 user_config_manager = UserConfigManager()
 ai_provider_manager = AIProviderManager()
-ai_setup = ImprovedAISetup()
+ai_setup = ImprovedAISetup(user_config_manager)
 listing_generator = ListingGenerator(ai_provider_manager)
 
 # Draft storage directory
 DRAFTS_DIR = 'user_drafts'
 os.makedirs(DRAFTS_DIR, exist_ok=True)
 
-@app.route('/')
-def index():
-    """Health check endpoint"""
-    return jsonify({
+# Extensions treated as draft images
+DRAFT_IMAGE_EXTS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.webp'})
+MAX_DRAFTS = 10
+
+def _is_draft_image(name: str) -> bool:
+    """Whether a directory entry name has a draft image extension"""
+    return name[name.rfind('.'):].lower() in DRAFT_IMAGE_EXTS
+
+draft_store = DraftStore(DRAFTS_DIR, _is_draft_image)
+
+# Longest client-supplied name kept in a stored filename, extension included
+MAX_UPLOAD_NAME = 64
+
+def _safe_upload_name(raw: str) -> Optional[str]:
+    """Sanitized, length-capped upload name, or None when it is not an accepted image type"""
+    name = secure_filename(raw)
+    stem, dot, ext = name.rpartition('.')
+    ext = ext.lower()
+    if not dot or '.' + ext not in DRAFT_IMAGE_EXTS:
+        return None
+    return f"{stem[:MAX_UPLOAD_NAME - len(ext) - 1]}.{ext}"
+
+# Uploaded image directory
+IMAGES_DIR = 'images'
+os.makedirs(IMAGES_DIR, exist_ok=True)
+
+# Copy uploads in 1 MiB chunks to keep syscall count low for multi-MB images
+UPLOAD_COPY_BUFFER_SIZE = 1024 * 1024
+
+def _gevent_patched() -> bool:
+    """Whether wsgi.py monkey-patched threading, turning Python threads into greenlets"""
+    return gevent is not None and gevent_monkey.is_module_patched('threading')
+
+def _run_blocking(fn, *args):
+    """Run a blocking disk call without stalling the other requests sharing this worker.
+
+    File IO is not cooperative under gevent, so it goes to the hub's native thread pool.
+    """
+    if _gevent_patched():
+        return gevent.get_hub().threadpool.apply(fn, args)
+    return fn(*args)
+
+def _optimize_uploads(images):
+    """Validate and optimize uploaded listing images in parallel; invalid images come back as None.
+
+    Under gevent the batch fans out over the hub's native threads (Pillow releases the GIL
+    while decoding, resizing and encoding); otherwise it goes to the generator's process pool.
+    """
+    if _gevent_patched() and len(images) > 1:
+        return list(gevent.get_hub().threadpool.imap(listing_generator.validate_and_optimize, images))
+    return listing_generator.validate_and_optimize_batch(images)
+
+# One year, the conventional maximum for immutable assets
+IMAGE_CACHE_MAX_AGE = 31536000
+_IMAGE_CACHE_CONTROL = f'public, max-age={IMAGE_CACHE_MAX_AGE}, immutable'
+
+# When fronted by nginx, set to the internal location mapped to IMAGES_DIR (e.g. /_images/)
+# so nginx sendfile()s the bytes and the worker never opens the image
+IMAGE_ACCEL_PREFIX = os.getenv('IMAGE_ACCEL_PREFIX')
+
+# Static payloads are compressed once at startup instead of on every request
+PREFERRED_ENCODINGS = ('br', 'gzip')
+
+def _encode_variants(data: bytes) -> Dict[str, bytes]:
+    """Precompute every Content-Encoding variant of a static payload"""
+    variants = {'identity': data, 'gzip': gzip.compress(data, compresslevel=9)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    return variants
+
+def _fast_etag(data: bytes) -> str:
+    """Strong ETag from a fast 128-bit digest of the representation or its version token"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def _matching_etag(etag: str) -> Optional[str]:
+    """The If-None-Match tag that validates etag, if any.
+
+    Flask-Compress rewrites the ETag of bodies it compresses to "<etag>:<encoding>", so
+    clients holding a compressed copy send that form back.
+    """
+    for candidate in (etag, *(f"{etag}:{encoding}" for encoding in app.config['COMPRESS_ALGORITHM'])):
+        if candidate in request.if_none_match:
+            return candidate
+    return None
+
+def _precompressed_response(variants: Dict[str, bytes], mimetype: str, etag: Optional[str] = None) -> Response:
+    """Serve the best precomputed variant the client's Accept-Encoding allows, answering 304 on a matching ETag"""
+    accepted = request.accept_encodings
+    encoding = next((e for e in PREFERRED_ENCODINGS if e in variants and accepted[e]), 'identity')
+    response = Response(variants[encoding], mimetype=mimetype)
+    if encoding != 'identity':
+        response.content_encoding = encoding
+    response.vary.add('Accept-Encoding')
+    if etag is not None:
+        # Each encoding is a different representation, so it gets its own strong tag
+        response.set_etag(f"{etag}-{encoding}")
+        response = response.make_conditional(request)
+    return response
+
+# eBay categories rarely change, so they are served from memory and reloaded only when the file's mtime moves
+EBAY_CATEGORIES_FILE = 'ebay_categories.json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+def _load_ebay_categories() -> Dict[str, Dict[str, bytes]]:
+    """Read ebay_categories.json once and pre-encode it for every supported mimetype"""
+    with open(EBAY_CATEGORIES_FILE, 'rb') as f:
+        data = f.read()
+    categories = orjson.loads(data)  # Fail fast on malformed JSON
+    payloads = {'application/json': _encode_variants(data)}
+    if msgpack is not None:
+        payloads[MSGPACK_MIMETYPE] = _encode_variants(msgpack.packb(categories, use_bin_type=True))
+    return payloads
+
+# (mtime_ns of the file when loaded, pre-encoded payloads)
+_ebay_categories: Optional[Tuple[int, Dict[str, Dict[str, bytes]]]] = None
+
+def _current_ebay_categories() -> Dict[str, Dict[str, bytes]]:
+    """Cached category payloads, reloaded when ebay_categories.json changes on disk"""
+    global _ebay_categories
+    mtime = os.stat(EBAY_CATEGORIES_FILE).st_mtime_ns
+    cached = _ebay_categories
+    if cached is None or cached[0] != mtime:
+        cached = _ebay_categories = (mtime, _load_ebay_categories())
+    return cached[1]
+
+try:
+    _current_ebay_categories()
+except Exception as e:
+    logger.warning("eBay categories not loaded at startup, retrying on first request: %s", e)
+
+# AI setup info only depends on static provider metadata, so it is serialized once
+AI_SETUP_INSTRUCTIONS = {
+    "openai": {
+        "name": "OpenAI (GPT-4)",
+        "url": "https://platform.openai.com/api-keys",
+        "instructions": "Create an API key at OpenAI platform",
+        "format": "sk-...",
+        "free_tier": "No free tier, pay per use"
+    },
+    "claude": {
+        "name": "Anthropic Claude",
+        "url": "https://console.anthropic.com/",
+        "instructions": "Create an API key in Anthropic console",
+        "format": "sk-ant-...",
+        "free_tier": "No free tier, pay per use"
+    },
+    "gemini": {
+        "name": "Google Gemini",
+        "url": "https://makersuite.google.com/app/apikey",
+        "instructions": "Create an API key in Google AI Studio",
+        "format": "AIza...",
+        "free_tier": "Free tier available"
+    },
+    "ollama": {
+        "name": "Local Ollama",
+        "url": "https://ollama.ai/",
+        "instructions": "Install Ollama locally and run models",
+        "format": "http://localhost:11434",
+        "free_tier": "Completely free, runs locally"
+    }
+}
+
+_AI_SETUP_JSON = orjson.dumps({
+    "providers": dict(ai_setup.providers),  # orjson does not serialize mappingproxy
+    "instructions": AI_SETUP_INSTRUCTIONS
+})
+_AI_SETUP_INFO = _encode_variants(_AI_SETUP_JSON)
+_AI_SETUP_ETAG = _fast_etag(_AI_SETUP_JSON)
+
+# The provider registry is fixed at startup, so its listing is serialized once
+_AI_PROVIDERS = ai_provider_manager.list_providers()
+_AI_PROVIDERS_JSON = orjson.dumps({"providers": _AI_PROVIDERS, "count": len(_AI_PROVIDERS)})
+
+# Pre-serialized bodies for the fixed error responses
+_ERR_INVALID_JSON = orjson.dumps({"error": "Invalid JSON body"})
+_ERR_NEED_USER_ID = orjson.dumps({"error": "user_id is required"})
+_ERR_NEED_PROVIDER_KEY = orjson.dumps({"error": "provider and api_key are required"})
+_ERR_USER_NOT_FOUND = orjson.dumps({"error": "User not found"})
+_ERR_USER_EXISTS = orjson.dumps({"error": "User already exists"})
+_ERR_NO_AI_PROVIDER = orjson.dumps({"error": "No AI provider configured"})
+_ERR_AI_NOT_CONFIGURED = orjson.dumps({"error": "AI provider not configured. Please set up AI first."})
+_ERR_INVALID_KEY_FMT = orjson.dumps({"error": "Invalid API key format"})
+_ERR_NEED_ITEM_DATA = orjson.dumps({"error": "user_id and item_data are required"})
+_ERR_NEED_IMAGE_FILENAMES = orjson.dumps({"error": "user_id and image_filenames are required"})
+_ERR_NEED_LISTING_FIELDS = orjson.dumps({"error": "Missing required fields: imageUrls, message, userId"})
+_ERR_NO_IMAGE = orjson.dumps({"error": "No image file provided"})
+_ERR_NO_IMAGES = orjson.dumps({"error": "No images provided"})
+_ERR_NO_FILE_SELECTED = orjson.dumps({"error": "No file selected"})
+_ERR_NO_IMAGES_SELECTED = orjson.dumps({"error": "No images selected"})
+_ERR_UNSUPPORTED_IMAGE = orjson.dumps({"error": "Unsupported image type"})
+_ERR_DRAFT_LIMIT = orjson.dumps({"error": "Maximum of 10 draft images allowed per user"})
+_ERR_DRAFT_NOT_FOUND = orjson.dumps({"error": "Draft image not found"})
+_ERR_IMAGE_NOT_FOUND = orjson.dumps({"error": "Image not found"})
+_ERR_LISTING_NOT_FOUND = orjson.dumps({"error": "Listing not found"})
+_ERR_NOT_FOUND_ENDPOINT = orjson.dumps({"error": "Endpoint not found"})
+_ERR_INTERNAL = orjson.dumps({"error": "Internal server error"})
+
+def _json_body() -> Any:
+    """Parse the request body with orjson, treating an empty body as an empty object"""
+    return orjson.loads(request.get_data(cache=False) or b'{}')
+
+def err(body: bytes, status: int) -> Response:
+    """Return a pre-serialized error body with the given status"""
+    return Response(body, status=status, mimetype='application/json')
+
+def ojsonify(obj: Any, status: int = 200) -> Response:
+    """Serialize obj with orjson and wrap it in a JSON response"""
+    return Response(orjson.dumps(obj, default=str), status=status, mimetype='application/json')
+
+class SafeUserConfig(msgspec.Struct):
+    """Public projection of a user config, without credentials"""
+    user_id: str
+    ai_provider: Optional[str]
+    created_at: Optional[str]
+    last_updated: Optional[str]
+
+_struct_encoder = msgspec.json.Encoder()
+_msgpack_encoder = msgspec.msgpack.Encoder()
+
+# JSON first so it wins ties for clients that accept anything
+_DRAFT_LIST_MIMETYPES = ['application/json', MSGPACK_MIMETYPE]
+
+@lru_cache(maxsize=1)
+def _health_body(second: int) -> bytes:
+    """Health check body, rebuilt at most once per second under polling"""
+    return orjson.dumps({
         "status": "healthy",
         "service": "PictoPost eBay Lister API",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": datetime.fromtimestamp(second).isoformat(),
         "version": "1.0.0"
     })
 
+@lru_cache(maxsize=1)
+def _second_stamp(second: int) -> str:
+    """Local YYYYmmdd_HHMMSS string, formatted once per second rather than per upload"""
+    return time.strftime('%Y%m%d_%H%M%S', time.localtime(second))
+
+def _timestamp_prefix() -> str:
+    """Sortable filename prefix; the nanosecond fraction keeps bursts within one second distinct"""
+    second, fraction = divmod(time.time_ns(), 1_000_000_000)
+    return f"{_second_stamp(second)}_{fraction:09d}"
+
+@app.route('/')
+def index():
+    """Health check endpoint"""
+    return Response(_health_body(int(time.time())), mimetype='application/json')
+
 # User Management Endpoints
 @app.route('/api/users', methods=['POST'])
 def create_user():
     """Create a new user"""
     try:
-        data = request.get_json()
+        data = _json_body()
         user_id = data.get('user_id')
         
         if not user_id:
-            return jsonify({"error": "user_id is required"}), 400
+            return err(_ERR_NEED_USER_ID, 400)
         
         if user_config_manager.create_user(user_id):
-            return jsonify({
+            return ojsonify({
                 "success": True,
                 "message": f"User '{user_id}' created successfully",
                 "user_id": user_id
-            }), 201
+            }, 201)
         else:
-            return jsonify({"error": "User already exists"}), 409
+            return err(_ERR_USER_EXISTS, 409)
             
+    except orjson.JSONDecodeError:
+        return err(_ERR_INVALID_JSON, 400)
     except Exception as e:
-        logger.error(f"Error creating user: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error creating user: %s", e)
+        return ojsonify({"error": str(e)}, 500)
 
 @app.route('/api/users/<user_id>', methods=['GET'])
 def get_user(user_id):
     """Get user configuration"""
     try:
-        config = user_config_manager._load_user_config(user_id)
+        # Read-only view; only four fields are copied out below
+        config = user_config_manager.get_user_config_view(user_id)
         if config:
             # Don't return sensitive data
-            safe_config = {
-                "user_id": user_id,
-                "ai_provider": config.get("ai_provider"),
-                "created_at": config.get("created_at"),
-                "last_updated": config.get("last_updated")
-            }
-            return jsonify(safe_config)
+            safe_config = SafeUserConfig(
+                user_id,
+                config.get("ai_provider"),
+                config.get("created_at"),
+                config.get("last_updated")
+            )
+            return Response(_struct_encoder.encode(safe_config), mimetype='application/json')
         else:
-            return jsonify({"error": "User not found"}), 404
+            return err(_ERR_USER_NOT_FOUND, 404)
             
     except Exception as e:
-        logger.error(f"Error getting user: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error getting user: %s", e)
+        return ojsonify({"error": str(e)}, 500)
 
 @app.route('/api/users/<user_id>', methods=['DELETE'])
 def delete_user(user_id):
     """Delete a user"""
     try:
         if user_config_manager.delete_user(user_id):
-            return jsonify({
+            return ojsonify({
                 "success": True,
                 "message": f"User '{user_id}' deleted successfully"
             })
         else:
-            return jsonify({"error": "User not found"}), 404
+            return err(_ERR_USER_NOT_FOUND, 404)
             
     except Exception as e:
-        logger.error(f"Error deleting user: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error deleting user: %s", e)
+        return ojsonify({"error": str(e)}, 500)
 
 # AI Provider Endpoints
 @app.route('/api/ai/providers', methods=['GET'])
 def list_ai_providers():
     """List available AI providers"""
-    try:
-        providers = ai_provider_manager.list_providers()
-        return jsonify({
-            "providers": providers,
-            "count": len(providers)
-        })
-    except Exception as e:
-        logger.error(f"Error listing AI providers: {e}")
-        return jsonify({"error": str(e)}), 500
+    return Response(_AI_PROVIDERS_JSON, mimetype='application/json')
 
 @app.route('/api/ai/setup', methods=['GET'])
 def get_ai_setup_info():
     """Get AI setup information and instructions"""
-    try:
-        setup_info = {
-            "providers": ai_setup.providers,
-            "instructions": {
-                "openai": {
-                    "name": "OpenAI (GPT-4)",
-                    "url": "https://platform.openai.com/api-keys",
-                    "instructions": "Create an API key at OpenAI platform",
-                    "format": "sk-...",
-                    "free_tier": "No free tier, pay per use"
-                },
-                "claude": {
-                    "name": "Anthropic Claude",
-                    "url": "https://console.anthropic.com/",
-                    "instructions": "Create an API key in Anthropic console",
-                    "format": "sk-ant-...",
-                    "free_tier": "No free tier, pay per use"
-                },
-                "gemini": {
-                    "name": "Google Gemini",
-                    "url": "https://makersuite.google.com/app/apikey",
-                    "instructions": "Create an API key in Google AI Studio",
-                    "format": "AIza...",
-                    "free_tier": "Free tier available"
-                },
-                "ollama": {
-                    "name": "Local Ollama",
-                    "url": "https://ollama.ai/",
-                    "instructions": "Install Ollama locally and run models",
-                    "format": "http://localhost:11434",
-                    "free_tier": "Completely free, runs locally"
-                }
-            }
-        }
-        return jsonify(setup_info)
-    except Exception as e:
-        logger.error(f"Error getting AI setup info: {e}")
-        return jsonify({"error": str(e)}), 500
+    return _precompressed_response(_AI_SETUP_INFO, 'application/json', _AI_SETUP_ETAG)
 
 @app.route('/api/ai/validate', methods=['POST'])
 def validate_ai_key():
     """Validate an AI provider API key"""
     try:
-        data = request.get_json()
+        data = _json_body()
         provider = data.get('provider')
         api_key = data.get('api_key')
         
         if not provider or not api_key:
-            return jsonify({"error": "provider and api_key are required"}), 400
+            return err(_ERR_NEED_PROVIDER_KEY, 400)
         
         is_valid = ai_setup._validate_api_key_format(provider, api_key)
         
-        return jsonify({
+        return ojsonify({
             "provider": provider,
             "is_valid": is_valid,
             "message": "Key format validated" if is_valid else "Invalid key format"
         })
         
+    except orjson.JSONDecodeError:
+        return err(_ERR_INVALID_JSON, 400)
     except Exception as e:
-        logger.error(f"Error validating AI key: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error validating AI key: %s", e)
+        return ojsonify({"error": str(e)}, 500)
 
 @app.route('/api/users/<user_id>/ai-provider', methods=['POST'])
 def set_user_ai_provider(user_id):
     """Set user's AI provider and API key"""
     try:
-        data = request.get_json()
+        data = _json_body()
         provider = data.get('provider')
         api_key = data.get('api_key')
         
         if not provider or not api_key:
-            return jsonify({"error": "provider and api_key are required"}), 400
+            return err(_ERR_NEED_PROVIDER_KEY, 400)
         
         # Validate key format first
         if not ai_setup._validate_api_key_format(provider, api_key):
-            return jsonify({"error": "Invalid API key format"}), 400
+            return err(_ERR_INVALID_KEY_FMT, 400)
         
         user_config_manager.set_ai_provider(user_id, provider, api_key)
         
-        return jsonify({
+        return ojsonify({
             "success": True,
             "message": f"AI provider '{provider}' set for user '{user_id}'",
             "user_id": user_id,
             "provider": provider
         })
         
+    except orjson.JSONDecodeError:
+        return err(_ERR_INVALID_JSON, 400)
     except Exception as e:
-        logger.error(f"Error setting AI provider: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error setting AI provider: %s", e)
+        return ojsonify({"error": str(e)}, 500)
 
 @app.route('/api/users/<user_id>/ai-provider', methods=['GET'])
 def get_user_ai_provider(user_id):
@@ -220,39 +464,42 @@ def get_user_ai_provider(user_id):
     try:
         provider = user_config_manager.get_ai_provider(user_id)
         if provider:
-            return jsonify({
+            return ojsonify({
                 "user_id": user_id,
                 "provider": provider
             })
         else:
-            return jsonify({"error": "No AI provider configured"}), 404
+            return err(_ERR_NO_AI_PROVIDER, 404)
             
     except Exception as e:
-        logger.error(f"Error getting AI provider: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error getting AI provider: %s", e)
+        return ojsonify({"error": str(e)}, 500)
 
 # eBay Integration Endpoints
 @app.route('/api/ebay/categories', methods=['GET'])
 def get_ebay_categories():
     """Get eBay categories"""
     try:
-        with open('ebay_categories.json', 'r') as f:
-            categories = json.load(f)
-        return jsonify(categories)
+        categories = _current_ebay_categories()
+        # JSON stays the default; msgpack is only sent to clients that explicitly prefer it
+        mimetype = request.accept_mimetypes.best_match(list(categories)) or 'application/json'
+        response = _precompressed_response(categories[mimetype], mimetype)
+        response.vary.add('Accept')
+        return response
     except Exception as e:
-        logger.error(f"Error getting eBay categories: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error getting eBay categories: %s", e)
+        return ojsonify({"error": str(e)}, 500)
 
 @app.route('/api/ebay/list-item', methods=['POST'])
 def list_ebay_item():
     """List an item on eBay"""
     try:
-        data = request.get_json()
+        data = _json_body()
         user_id = data.get('user_id')
         item_data = data.get('item_data')
         
         if not user_id or not item_data:
-            return jsonify({"error": "user_id and item_data are required"}), 400
+            return err(_ERR_NEED_ITEM_DATA, 400)
         
         # Get user's AI provider for enhanced listing
         ai_provider = user_config_manager.get_ai_provider(user_id)
@@ -264,17 +511,19 @@ def list_ebay_item():
         # For now, return a mock response
         listing_result = {
             "success": True,
-            "listing_id": f"ebay_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            "listing_id": f"ebay_{_timestamp_prefix()}",
             "message": "Item listed successfully",
             "ai_enhanced": bool(ai_provider),
             "user_id": user_id
         }
         
-        return jsonify(listing_result)
+        return ojsonify(listing_result)
         
+    except orjson.JSONDecodeError:
+        return err(_ERR_INVALID_JSON, 400)
     except Exception as e:
-        logger.error(f"Error listing eBay item: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error listing eBay item: %s", e)
+        return ojsonify({"error": str(e)}, 500)
 
 # Draft Image Management Endpoints
 @app.route('/api/upload/draft-image', methods=['POST'])
@@ -282,37 +531,38 @@ def upload_draft_image():
     """Upload an image as a draft for a user"""
     try:
         if 'image' not in request.files:
-            return jsonify({"error": "No image file provided"}), 400
+            return err(_ERR_NO_IMAGE, 400)
         
         file = request.files['image']
         user_id = request.form.get('user_id')
         
         if not user_id:
-            return jsonify({"error": "user_id is required"}), 400
+            return err(_ERR_NEED_USER_ID, 400)
         
         if file.filename == '':
-            return jsonify({"error": "No file selected"}), 400
+            return err(_ERR_NO_FILE_SELECTED, 400)
+        
+        name = _safe_upload_name(file.filename)
+        if name is None:
+            return err(_ERR_UNSUPPORTED_IMAGE, 415)
         
         # Check current draft count for user
         user_drafts_dir = os.path.join(DRAFTS_DIR, user_id)
         os.makedirs(user_drafts_dir, exist_ok=True)
         
-        current_drafts = [f for f in os.listdir(user_drafts_dir) 
-                         if f.endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp'))]
-        
-        if len(current_drafts) >= 10:
-            return jsonify({"error": "Maximum of 10 draft images allowed per user"}), 400
+        if draft_store.count_drafts(user_id) >= MAX_DRAFTS:
+            return err(_ERR_DRAFT_LIMIT, 400)
         
         # Save file with timestamp prefix
-        filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
+        filename = f"{_timestamp_prefix()}_{name}"
         filepath = os.path.join(user_drafts_dir, filename)
         
-        file.save(filepath)
+        size = _run_blocking(_save_upload, file.stream, filepath)
         
         # Update user's draft metadata
-        _update_user_draft_metadata(user_id, filename, 'added')
+        _update_user_draft_metadata(user_id, filename, 'added', size)
         
-        return jsonify({
+        return ojsonify({
             "success": True,
             "filename": filename,
             "filepath": filepath,
@@ -320,42 +570,48 @@ def upload_draft_image():
         })
         
     except Exception as e:
-        logger.error(f"Error uploading draft image: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error uploading draft image: %s", e)
+        return ojsonify({"error": str(e)}, 500)
 
 @app.route('/api/users/<user_id>/drafts', methods=['GET'])
 def get_user_drafts(user_id):
     """Get all draft images for a user"""
     try:
-        user_drafts_dir = os.path.join(DRAFTS_DIR, user_id)
-        
-        if not os.path.exists(user_drafts_dir):
-            return jsonify({"drafts": []})
-        
-        drafts = []
-        for filename in os.listdir(user_drafts_dir):
-            if filename.endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
-                filepath = os.path.join(user_drafts_dir, filename)
-                file_stats = os.stat(filepath)
-                
-                drafts.append({
-                    "filename": filename,
-                    "uploaded_at": datetime.fromtimestamp(file_stats.st_ctime).isoformat(),
-                    "size": file_stats.st_size
-                })
-        
-        # Sort by upload date (most recent first)
-        drafts.sort(key=lambda x: x['uploaded_at'], reverse=True)
-        
-        return jsonify({
-            "drafts": drafts,
-            "count": len(drafts),
-            "max_allowed": 10
-        })
+        # Answer repeat polls from the event index before building the listing
+        mimetype = request.accept_mimetypes.best_match(_DRAFT_LIST_MIMETYPES) or 'application/json'
+        etag = _fast_etag(f"{user_id}|{mimetype}|{draft_store.version(user_id)}".encode())
+        matched = _matching_etag(etag)
+        if matched is not None:
+            response = Response(status=304)
+            response.set_etag(matched)
+            response.vary.update(('Accept', 'Accept-Encoding'))
+            return response
+        
+        # Indexed by (user_id, status, uploaded_at), already newest first
+        if mimetype == MSGPACK_MIMETYPE:
+            # Binary variant keeps uploaded_at as epoch seconds, skipping ISO formatting
+            rows = draft_store.draft_rows(user_id)
+            body = _msgpack_encoder.encode({
+                "drafts": [{"filename": f, "uploaded_at": int(ts), "size": size} for f, ts, size in rows],
+                "count": len(rows),
+                "max_allowed": MAX_DRAFTS
+            })
+            response = Response(body, mimetype=MSGPACK_MIMETYPE)
+        else:
+            drafts = draft_store.list_drafts(user_id)
+            response = ojsonify({
+                "drafts": drafts,
+                "count": len(drafts),
+                "max_allowed": MAX_DRAFTS
+            })
+        # Representations differ by Accept, so caches and ETags must too
+        response.vary.add('Accept')
+        response.set_etag(etag)
+        return response
         
     except Exception as e:
-        logger.error(f"Error getting user drafts: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error getting user drafts: %s", e)
+        return ojsonify({"error": str(e)}, 500)
 
 @app.route('/api/users/<user_id>/drafts/<filename>', methods=['DELETE'])
 def delete_draft_image(user_id, filename):
@@ -364,107 +620,89 @@ def delete_draft_image(user_id, filename):
         user_drafts_dir = os.path.join(DRAFTS_DIR, user_id)
         filepath = os.path.join(user_drafts_dir, filename)
         
-        if not os.path.exists(filepath):
-            return jsonify({"error": "Draft image not found"}), 404
-        
-        os.remove(filepath)
+        try:
+            _run_blocking(os.remove, filepath)
+        except FileNotFoundError:
+            return err(_ERR_DRAFT_NOT_FOUND, 404)
         _update_user_draft_metadata(user_id, filename, 'deleted')
         
-        return jsonify({
+        return ojsonify({
             "success": True,
             "message": f"Draft image '{filename}' deleted successfully"
         })
         
     except Exception as e:
-        logger.error(f"Error deleting draft image: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error deleting draft image: %s", e)
+        return ojsonify({"error": str(e)}, 500)
 
 @app.route('/api/generate-listings', methods=['POST'])
 def generate_listings():
     """Generate eBay listings from user's draft images"""
     try:
-        data = request.get_json()
+        data = _json_body()
         user_id = data.get('user_id')
         image_filenames = data.get('image_filenames', [])
         
         if not user_id or not image_filenames:
-            return jsonify({"error": "user_id and image_filenames are required"}), 400
+            return err(_ERR_NEED_IMAGE_FILENAMES, 400)
         
         # Check if user has AI provider configured
         ai_provider = user_config_manager.get_ai_provider(user_id)
         if not ai_provider:
-            return jsonify({"error": "AI provider not configured. Please set up AI first."}), 400
+            return err(_ERR_AI_NOT_CONFIGURED, 400)
         
         user_drafts_dir = os.path.join(DRAFTS_DIR, user_id)
-        processed_images = []
-        
-        for filename in image_filenames:
-            filepath = os.path.join(user_drafts_dir, filename)
-            if os.path.exists(filepath):
-                processed_images.append(filename)
-                # In a real implementation, this would:
-                # 1. Use AI to analyze the image
-                # 2. Generate listing title, description, price
-                # 3. Create eBay listing
-                # 4. Delete the draft image after successful listing
-                
-                # For now, simulate by moving to processed folder
-                processed_dir = os.path.join(user_drafts_dir, 'processed')
-                os.makedirs(processed_dir, exist_ok=True)
-                
-                processed_path = os.path.join(processed_dir, filename)
-                os.rename(filepath, processed_path)
-        
-        _update_user_draft_metadata(user_id, processed_images, 'processed')
-        
-        return jsonify({
+        processed_dir = os.path.join(user_drafts_dir, 'processed')
+        
+        # In a real implementation, this would:
+        # 1. Use AI to analyze the image
+        # 2. Generate listing title, description, price
+        # 3. Create eBay listing
+        # 4. Delete the draft image after successful listing
+        
+        # For now, simulate by moving to processed folder, as one batch off the worker
+        processed_images = _run_blocking(_move_drafts, user_drafts_dir, processed_dir, image_filenames)
+        
+        # One history append for the whole batch
+        if processed_images:
+            _update_user_draft_metadata(user_id, processed_images, 'processed')
+        
+        return ojsonify({
             "success": True,
             "listings_created": len(processed_images),
             "processed_images": processed_images,
             "message": f"Successfully generated {len(processed_images)} listings"
         })
         
+    except orjson.JSONDecodeError:
+        return err(_ERR_INVALID_JSON, 400)
     except Exception as e:
-        logger.error(f"Error generating listings: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error generating listings: %s", e)
+        return ojsonify({"error": str(e)}, 500)
+
+def _move_drafts(src_dir: str, dst_dir: str, filenames) -> list:
+    """Move the named drafts into dst_dir, returning the ones that existed"""
+    os.makedirs(dst_dir, exist_ok=True)
+    src_base = src_dir + os.sep
+    dst_base = dst_dir + os.sep
+    moved = []
+    for filename in filenames:
+        # The rename doubles as the existence check so each file costs one syscall
+        try:
+            os.rename(src_base + filename, dst_base + filename)
+        except FileNotFoundError:
+            continue
+        moved.append(filename)
+    return moved
 
-def _update_user_draft_metadata(user_id: str, filenames, action: str):
-    """Update user's draft metadata"""
+def _update_user_draft_metadata(user_id: str, filenames, action: str, size: int = 0):
+    """Record draft events and the drafts' current status in the draft store"""
     try:
-        metadata_file = os.path.join(DRAFTS_DIR, user_id, 'metadata.json')
-        
-        # Load existing metadata
-        metadata = {}
-        if os.path.exists(metadata_file):
-            with open(metadata_file, 'r') as f:
-                metadata = json.load(f)
-        
-        # Update metadata
-        if 'history' not in metadata:
-            metadata['history'] = []
-        
-        if isinstance(filenames, list):
-            for filename in filenames:
-                metadata['history'].append({
-                    'filename': filename,
-                    'action': action,
-                    'timestamp': datetime.now().isoformat()
-                })
-        else:
-            metadata['history'].append({
-                'filename': filenames,
-                'action': action,
-                'timestamp': datetime.now().isoformat()
-            })
-        
-        metadata['last_updated'] = datetime.now().isoformat()
-        
-        # Save updated metadata
-        with open(metadata_file, 'w') as f:
-            json.dump(metadata, f, indent=2)
-            
+        if not isinstance(filenames, list):
+            filenames = [filenames]
+        draft_store.record(user_id, filenames, action, size)
     except Exception as e:
-        logger.error(f"Error updating draft metadata: {e}")
+        logger.error("Error updating draft metadata: %s", e)
 
 # File Upload Endpoints
 @app.route('/api/upload/image', methods=['POST'])
@@ -472,22 +710,24 @@ def upload_image():
     """Upload an image for listing"""
     try:
         if 'image' not in request.files:
-            return jsonify({"error": "No image file provided"}), 400
+            return err(_ERR_NO_IMAGE, 400)
         
         file = request.files['image']
         if file.filename == '':
-            return jsonify({"error": "No file selected"}), 400
+            return err(_ERR_NO_FILE_SELECTED, 400)
         
-        # Save file to images directory
-        filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
-        filepath = os.path.join('images', filename)
+        name = _safe_upload_name(file.filename)
+        if name is None:
+            return err(_ERR_UNSUPPORTED_IMAGE, 415)
         
-        # Ensure images directory exists
-        os.makedirs('images', exist_ok=True)
+        # Save file to images directory
+        filename = f"{_timestamp_prefix()}_{name}"
+        filepath = os.path.join(IMAGES_DIR, filename)
         
-        file.save(filepath)
+        # Stream to disk off the worker and wait, so the path we return exists
+        _run_blocking(_save_upload, file.stream, filepath)
         
-        return jsonify({
+        return ojsonify({
             "success": True,
             "filename": filename,
             "filepath": filepath,
@@ -495,30 +735,70 @@ def upload_image():
         })
         
     except Exception as e:
-        logger.error(f"Error uploading image: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error uploading image: %s", e)
+        return ojsonify({"error": str(e)}, 500)
+
+def _save_upload(stream, filepath: str):
+    """Write an upload stream to disk in large chunks, or in-kernel when it is spooled to a real file.
+
+    The file is published atomically, so readers never see a partial image; a failed write
+    leaves nothing behind and re-raises. Returns the number of bytes written.
+    """
+    tmp_path = f"{filepath}.part"
+    try:
+        size = _copy_upload(stream, tmp_path)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    return size
+
+def _copy_upload(stream, filepath: str) -> int:
+    """Copy an upload stream into filepath, returning the number of bytes written"""
+    with open(filepath, 'wb', buffering=0) as dst:
+        try:
+            src_fd = stream.fileno()  # Werkzeug spools large uploads to a TemporaryFile
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            src_fd = None
+        if src_fd is not None and hasattr(os, 'sendfile'):
+            offset, size = stream.tell(), os.fstat(src_fd).st_size
+            while offset < size:
+                sent = os.sendfile(dst.fileno(), src_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        else:
+            shutil.copyfileobj(stream, dst, length=UPLOAD_COPY_BUFFER_SIZE)
+        return dst.tell()
 
 @app.route('/api/images/<filename>')
 def get_image(filename):
     """Serve uploaded images"""
     try:
-        return send_from_directory('images', filename)
+        # Filenames are timestamp-prefixed and never rewritten, so clients may cache forever
+        if IMAGE_ACCEL_PREFIX:
+            response = Response(headers={'X-Accel-Redirect': IMAGE_ACCEL_PREFIX + secure_filename(filename)})
+        else:
+            response = send_from_directory(IMAGES_DIR, filename, conditional=True, etag=True, max_age=IMAGE_CACHE_MAX_AGE)
+        response.headers['Cache-Control'] = _IMAGE_CACHE_CONTROL
+        return response
     except Exception as e:
-        logger.error(f"Error serving image: {e}")
-        return jsonify({"error": "Image not found"}), 404
+        logger.error("Error serving image: %s", e)
+        return err(_ERR_IMAGE_NOT_FOUND, 404)
 
 # Listing Generation Endpoints
 @app.route('/api/listing/generate', methods=['POST'])
 def generate_listing():
     """Generate eBay listing from images using AI"""
     try:
-        data = request.get_json()
+        data = _json_body()
         image_urls = data.get('imageUrls', [])
         message = data.get('message', '')
         user_id = data.get('userId', '')
         
         if not image_urls or not message or not user_id:
-            return jsonify({"error": "Missing required fields: imageUrls, message, userId"}), 400
+            return err(_ERR_NEED_LISTING_FIELDS, 400)
         
         # Get user's AI provider preference
         ai_provider = user_config_manager.get_ai_provider(user_id) or "openai"
@@ -539,76 +819,82 @@ def generate_listing():
             listings_dir = "listings"
             os.makedirs(listings_dir, exist_ok=True)
             
-            listing_file = os.path.join(listings_dir, f"listing_{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-            with open(listing_file, 'w') as f:
-                json.dump(listing_data, f, indent=2)
+            listing_file = os.path.join(listings_dir, f"listing_{user_id}_{_timestamp_prefix()}.json")
+            with open(listing_file, 'wb') as f:
+                f.write(orjson.dumps(listing_data))
             
-            return jsonify({
+            return ojsonify({
                 "success": True,
                 "listing": listing_data,
                 "message": "Listing generated successfully"
             })
         else:
-            return jsonify({
+            return ojsonify({
                 "success": False,
                 "error": result["error"],
                 "message": result["message"]
-            }), 500
+            }, 500)
             
+    except orjson.JSONDecodeError:
+        return err(_ERR_INVALID_JSON, 400)
     except Exception as e:
-        logger.error(f"Error generating listing: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error generating listing: %s", e)
+        return ojsonify({"error": str(e)}, 500)
 
 @app.route('/api/listing/upload-images', methods=['POST'])
 def upload_images_for_listing():
     """Upload multiple images for listing generation"""
     try:
         if 'images' not in request.files:
-            return jsonify({"error": "No images provided"}), 400
+            return err(_ERR_NO_IMAGES, 400)
         
         files = request.files.getlist('images')
         user_id = request.form.get('userId', 'default_user')
         
         if not files:
-            return jsonify({"error": "No images selected"}), 400
+            return err(_ERR_NO_IMAGES_SELECTED, 400)
         
-        uploaded_urls = []
+        uploads = []
+        images = []
         
         for file in files:
             if file.filename == '':
                 continue
-                
-            # Validate image
-            image_data = file.read()
-            if not listing_generator.validate_image(image_data):
-                return jsonify({"error": f"Invalid image: {file.filename}"}), 400
             
-            # Optimize image
-            optimized_data = listing_generator.optimize_image(image_data)
+            name = _safe_upload_name(file.filename)
+            if name is None:
+                return err(_ERR_UNSUPPORTED_IMAGE, 415)
             
+            uploads.append((file.filename, name))
+            images.append(file.read())
+        
+        # Validate and optimize the whole batch in parallel, decoding each image once
+        optimized = _optimize_uploads(images)
+        for (original_name, _), optimized_data in zip(uploads, optimized):
+            if optimized_data is None:
+                return ojsonify({"error": f"Invalid image: {original_name}"}, 400)
+        
+        uploaded_urls = []
+        for (_, name), optimized_data in zip(uploads, optimized):
             # Save optimized image
-            filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
-            filepath = os.path.join('images', filename)
-            
-            # Ensure images directory exists
-            os.makedirs('images', exist_ok=True)
+            filename = f"{_timestamp_prefix()}_{name}"
+            filepath = os.path.join(IMAGES_DIR, filename)
             
-            with open(filepath, 'wb') as f:
-                f.write(optimized_data)
+            _run_blocking(_save_upload, io.BytesIO(optimized_data), filepath)
             
             # Create URL for the uploaded image
             image_url = f"/api/images/{filename}"
             uploaded_urls.append(image_url)
         
-        return jsonify({
+        return ojsonify({
             "success": True,
             "imageUrls": uploaded_urls,
             "message": f"Uploaded {len(uploaded_urls)} images successfully"
         })
         
     except Exception as e:
-        logger.error(f"Error uploading images: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error uploading images: %s", e)
+        return ojsonify({"error": str(e)}, 500)
 
 @app.route('/api/listing/listings/<user_id>', methods=['GET'])
 def get_user_listings(user_id):
@@ -616,31 +902,31 @@ def get_user_listings(user_id):
     try:
         listings_dir = "listings"
         if not os.path.exists(listings_dir):
-            return jsonify({"listings": []})
+            return ojsonify({"listings": []})
         
         user_listings = []
         for filename in os.listdir(listings_dir):
             if filename.startswith(f"listing_{user_id}_"):
                 filepath = os.path.join(listings_dir, filename)
                 try:
-                    with open(filepath, 'r') as f:
-                        listing_data = json.load(f)
+                    with open(filepath, 'rb') as f:
+                        listing_data = orjson.loads(f.read())
                         user_listings.append(listing_data)
                 except Exception as e:
-                    logger.error(f"Error reading listing file {filename}: {e}")
+                    logger.error("Error reading listing file %s: %s", filename, e)
         
         # Sort by generation date (newest first)
         user_listings.sort(key=lambda x: x.get('generated_at', ''), reverse=True)
         
-        return jsonify({
+        return ojsonify({
             "success": True,
             "listings": user_listings,
             "count": len(user_listings)
         })
         
     except Exception as e:
-        logger.error(f"Error getting user listings: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error getting user listings: %s", e)
+        return ojsonify({"error": str(e)}, 500)
 
 @app.route('/api/listing/listings/<user_id>/<listing_id>', methods=['DELETE'])
 def delete_listing(user_id, listing_id):
@@ -651,26 +937,26 @@ def delete_listing(user_id, listing_id):
         
         if os.path.exists(listing_file):
             os.remove(listing_file)
-            return jsonify({
+            return ojsonify({
                 "success": True,
                 "message": "Listing deleted successfully"
             })
         else:
-            return jsonify({"error": "Listing not found"}), 404
+            return err(_ERR_LISTING_NOT_FOUND, 404)
             
     except Exception as e:
-        logger.error(f"Error deleting listing: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Error deleting listing: %s", e)
+        return ojsonify({"error": str(e)}, 500)
 
 # Error handlers
 @app.errorhandler(404)
 def not_found(error):
-    return jsonify({"error": "Endpoint not found"}), 404
+    return err(_ERR_NOT_FOUND_ENDPOINT, 404)
 
 @app.errorhandler(500)
 def internal_error(error):
-    return jsonify({"error": "Internal server error"}), 500
+    return err(_ERR_INTERNAL, 500)
 
 if __name__ == '__main__':
-    # Development server
-    app.run(debug=True, host='0.0.0.0', port=8000)
+    # Development server only - production runs through wsgi.py under Gunicorn
+    app.run(debug=bool(os.getenv('FLASK_DEV')), host='0.0.0.0', port=8000)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Draft Image Metadata Store
+Tracks each user's draft images in SQLite so listing and counting drafts skip the filesystem
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Any, Iterable, Tuple
+
+
+class DraftStore:
+    """Per-user draft state and event history backed by a WAL-mode SQLite database"""
+
+    def __init__(self, drafts_dir: str, is_draft_image: Callable[[str], bool], db_path: str = "drafts.db"):
+        self.drafts_dir = drafts_dir
+        self.is_draft_image = is_draft_image
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # Users whose on-disk drafts have been reconciled with the table by this process
+        self._synced = set()
+        self.db = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS drafts ("
+            "user_id TEXT NOT NULL, filename TEXT NOT NULL, status TEXT NOT NULL, "
+            "uploaded_at REAL NOT NULL, size INTEGER NOT NULL, "
+            "PRIMARY KEY (user_id, filename))"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS drafts_listing ON drafts (user_id, status, uploaded_at)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS draft_events ("
+            "user_id TEXT NOT NULL, filename TEXT NOT NULL, action TEXT NOT NULL, ts REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS draft_events_user ON draft_events (user_id, ts)")
+
+    def _sync_user(self, user_id: str):
+        """Index drafts uploaded before this store existed; runs once per user per process"""
+        if user_id in self._synced:
+            return
+        rows = []
+        user_dir = os.path.join(self.drafts_dir, user_id)
+        if os.path.isdir(user_dir):
+            with os.scandir(user_dir) as entries:
+                for entry in entries:
+                    if entry.is_file() and self.is_draft_image(entry.name):
+                        stat = entry.stat()
+                        rows.append((user_id, entry.name, stat.st_ctime, stat.st_size))
+        with self._lock:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO drafts (user_id, filename, status, uploaded_at, size) "
+                "VALUES (?, ?, 'draft', ?, ?)",
+                rows
+            )
+        self._synced.add(user_id)
+
+    def record(self, user_id: str, filenames: Iterable[str], action: str, size: int = 0):
+        """Log an added/deleted/processed event and update the drafts' current status"""
+        now = time.time()
+        filenames = list(filenames)
+        with self._lock:
+            self.db.execute("BEGIN")
+            try:
+                if action == 'added':
+                    self.db.executemany(
+                        "INSERT OR REPLACE INTO drafts (user_id, filename, status, uploaded_at, size) "
+                        "VALUES (?, ?, 'draft', ?, ?)",
+                        [(user_id, filename, now, size) for filename in filenames]
+                    )
+                else:
+                    self.db.executemany(
+                        "UPDATE drafts SET status = ? WHERE user_id = ? AND filename = ?",
+                        [(action, user_id, filename) for filename in filenames]
+                    )
+                self.db.executemany(
+                    "INSERT INTO draft_events (user_id, filename, action, ts) VALUES (?, ?, ?, ?)",
+                    [(user_id, filename, action, now) for filename in filenames]
+                )
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def version(self, user_id: str) -> str:
+        """Token that changes whenever the user's drafts do, read from the event index alone"""
+        self._sync_user(user_id)
+        with self._lock:
+            count, last = self.db.execute(
+                "SELECT COUNT(*), MAX(ts) FROM draft_events WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return f"{count}-{last or 0}"
+
+    def count_drafts(self, user_id: str) -> int:
+        """Number of drafts the user currently holds"""
+        self._sync_user(user_id)
+        with self._lock:
+            row = self.db.execute(
+                "SELECT COUNT(*) FROM drafts WHERE user_id = ? AND status = 'draft'", (user_id,)
+            ).fetchone()
+        return row[0]
+
+    def draft_rows(self, user_id: str) -> List[Tuple[str, float, int]]:
+        """Current drafts as (filename, uploaded_at epoch, size), most recently uploaded first"""
+        self._sync_user(user_id)
+        with self._lock:
+            return self.db.execute(
+                "SELECT filename, uploaded_at, size FROM drafts "
+                "WHERE user_id = ? AND status = 'draft' ORDER BY uploaded_at DESC",
+                (user_id,)
+            ).fetchall()
+
+    def list_drafts(self, user_id: str) -> List[Dict[str, Any]]:
+        """Current drafts, most recently uploaded first"""
+        return [
+            {"filename": filename, "uploaded_at": datetime.fromtimestamp(uploaded_at).isoformat(), "size": size}
+            for filename, uploaded_at, size in self.draft_rows(user_id)
+        ]
@@ -6,39 +6,160 @@ Automated mass listing of vintage and collectible inventory to eBay using Invent
 
 import os
 import sys
-import json
+import csv
+import re
 import time
+import hashlib
 import logging
+import logging.handlers
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 from dotenv import load_dotenv
 import click
 from rich.console import Console
 from rich.table import Table
-from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.panel import Panel
 from tqdm import tqdm
 
+try:
+    import pyarrow
+    import pyarrow.csv as pacsv
+except ImportError:  # Fall back to pandas' own chunked C parser
+    pyarrow = None
+
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('ebay_lister.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger(__name__)
 
+
+def _start_log_listener() -> logging.handlers.QueueListener:
+    """Route CLI logging through a queue so workers never block on file or stdout writes.
+    
+    Configured from main() rather than at import, so importing this module (as app.py does)
+    leaves the host's logging alone.
+    """
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    file_handler = logging.FileHandler('ebay_lister.log')
+    stream_handler = logging.StreamHandler(sys.stdout)
+    file_handler.setFormatter(formatter)
+    stream_handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(logging.INFO)
+    
+    listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler)
+    listener.start()
+    return listener
+
 console = Console()
 
+# Concurrent listing workers and the eBay call rate they share
+MAX_WORKERS = int(os.getenv("EBAY_MAX_WORKERS", "8"))
+CALLS_PER_SECOND = float(os.getenv("EBAY_CALLS_PER_SECOND", "5"))
+# Inventory API cap on items per bulkCreateOrReplaceInventoryItem call
+BULK_BATCH_SIZE = 25
+# Rows parsed and dispatched at a time, so memory stays flat however large the catalog is
+INVENTORY_CHUNK_ROWS = 1000
+# Fallbacks for keys ebay_categories.json may omit; merged once so payload building never branches
+LISTING_DEFAULTS = {
+    "default_category": "45100",
+    "default_condition": "GOOD",
+    "default_brand": "Unbranded",
+    "default_type": "Collectible",
+    "default_material": "Mixed Materials",
+    "default_color": "Multicolor",
+    "default_country": "Unknown",
+    "default_weight": 1.0,
+    "default_weight_unit": "POUND",
+    "currency": "USD",
+    "marketplace_id": "EBAY_US",
+    "max_title_length": 80,
+    "max_images": 12,
+}
+POLICY_DEFAULTS = {
+    "fulfillment_policy_id": "FREIGHT_SHIPPING",
+    "payment_policy_id": "PAYMENT_IMMEDIATE",
+    "return_policy_id": "RETURN_30_DAYS",
+}
+REQUIRED_COLUMNS = ["Title", "Description", "Category", "Condition", "Photo Files"]
+NUMERIC_COLUMNS = ("Quantity", "Estimated Median Sale Price")
+# Columns hashed into the SKU of rows that have none, identifying the item rather than its row
+SKU_CONTENT_COLUMNS = ("Title", "Description", "Category", "Condition", "Photo Files", *NUMERIC_COLUMNS)
+
+# Refresh this long before expiry so in-flight requests never carry a token that lapses mid-call
+TOKEN_REFRESH_SKEW = timedelta(seconds=60)
+# Access tokens survive restarts here (owner-only permissions)
+TOKEN_CACHE_PATH = os.getenv("EBAY_TOKEN_CACHE", os.path.expanduser("~/.ebay_lister_token.json"))
+
+# Price patterns in AI value ranges, compiled once instead of per item
+_PRICE_RANGE_RE = re.compile(r'\$?(\d+(?:\.\d{2})?)\s*-\s*\$?(\d+(?:\.\d{2})?)')
+_PRICE_SINGLE_RE = re.compile(r'\$(\d+(?:\.\d{2})?)')
+
+
+class _EbayRetry(Retry):
+    """Retry policy that never replays a POST eBay may already have acted on.
+
+    POSTs create listings and offers, so a 5xx or a read timeout can follow a call that
+    succeeded; only 429, which eBay answers before doing any work, is retried for them.
+    """
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method == "POST":
+            return status_code == 429
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def _build_session() -> requests.Session:
+    """Pooled keep-alive session that retries throttled and transient eBay failures with backoff"""
+    session = requests.Session()
+    retry = _EbayRetry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        # Read errors are only retried for idempotent methods, so POST stays out of this set
+        allowed_methods=frozenset({"GET", "PUT"}),
+    )
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
+    session.mount("https://", adapter)
+    return session
+
+
+class TokenBucket:
+    """Thread-safe token bucket capping calls to rate_per_second, blocking callers until a slot frees."""
+    
+    def __init__(self, rate_per_second: float):
+        self.rate = max(rate_per_second, 0.1)
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
 
 class EbayAuth:
     """Handles eBay OAuth 2.0 authentication and token management."""
@@ -61,17 +182,70 @@ class EbayAuth:
         
         self.access_token = None
         self.token_expires_at = None
+        # Workers share one token; only the first to see it stale refreshes it
+        self._token_lock = threading.Lock()
+        self._load_cached_token()
+        
+        # Shared by every listing worker so requests reuse pooled connections
+        self.session = _build_session()
+    
+    def _token_fresh(self) -> bool:
+        """Whether the current access token is valid beyond the refresh skew."""
+        return bool(self.access_token and self.token_expires_at and
+                    datetime.now() + TOKEN_REFRESH_SKEW < self.token_expires_at)
     
     def get_access_token(self) -> str:
         """Get a valid access token, refreshing if necessary."""
-        if (self.access_token and self.token_expires_at and 
-            datetime.now() < self.token_expires_at):
+        if self._token_fresh():
             return self.access_token
         
-        if not self.refresh_token:
-            raise ValueError("No refresh token available. Please obtain one first.")
-        
-        return self._refresh_access_token()
+        with self._token_lock:
+            # Another worker may have refreshed while this one waited on the lock
+            if self._token_fresh():
+                return self.access_token
+            
+            if not self.refresh_token:
+                raise ValueError("No refresh token available. Please obtain one first.")
+            
+            return self._refresh_access_token()
+    
+    def invalidate_token(self, stale_token: str) -> None:
+        """Drop an access token eBay rejected, unless a worker already replaced it."""
+        with self._token_lock:
+            if self.access_token == stale_token:
+                self.access_token = None
+                self.token_expires_at = None
+    
+    def _load_cached_token(self) -> None:
+        """Restore a persisted token issued for this app and environment."""
+        try:
+            with open(TOKEN_CACHE_PATH, 'rb') as f:
+                cached = orjson.loads(f.read())
+        except (OSError, ValueError):
+            return
+        if cached.get("client_id") != self.client_id or cached.get("environment") != self.environment:
+            return
+        self.access_token = cached.get("access_token")
+        self.token_expires_at = datetime.fromtimestamp(cached.get("expires_at", 0))
+        self.refresh_token = cached.get("refresh_token") or self.refresh_token
+    
+    def _save_cached_token(self) -> None:
+        """Persist the current token with owner-only permissions."""
+        data = {
+            "client_id": self.client_id,
+            "environment": self.environment,
+            "access_token": self.access_token,
+            "expires_at": self.token_expires_at.timestamp(),
+            "refresh_token": self.refresh_token,
+        }
+        tmp_path = f"{TOKEN_CACHE_PATH}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps(data))
+            os.replace(tmp_path, TOKEN_CACHE_PATH)
+        except OSError as e:
+            logger.warning("Could not persist access token: %s", e)
     
     def _refresh_access_token(self) -> str:
         """Refresh the access token using the refresh token."""
@@ -90,10 +264,10 @@ class EbayAuth:
         auth = (self.client_id, self.client_secret)
         
         try:
-            response = requests.post(url, headers=headers, auth=auth, data=data)
+            response = self.session.post(url, headers=headers, auth=auth, data=data)
             response.raise_for_status()
             
-            token_data = response.json()
+            token_data = orjson.loads(response.content)
             self.access_token = token_data["access_token"]
             expires_in = token_data.get("expires_in", 7200)  # Default 2 hours
             self.token_expires_at = datetime.now() + timedelta(seconds=expires_in)
@@ -104,10 +278,11 @@ class EbayAuth:
                 logger.info("Refresh token updated")
             
             logger.info("Access token refreshed successfully")
+            self._save_cached_token()
             return self.access_token
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to refresh access token: {e}")
+            logger.error("Failed to refresh access token: %s", e)
             raise
     
     def get_headers(self) -> Dict[str, str]:
@@ -139,41 +314,118 @@ class EbayLister:
             logger.warning("AI providers not available - running in basic mode")
             self.ai_service = None
             self.user_config_manager = None
+        # The user's AI settings don't change during a run, so they are resolved once
+        self._ai_config = self._load_ai_config()
+        
+        # Category/condition mappings are read once; every row reuses the parsed config
+        self._config = self._load_config()
+        self._defaults = {**LISTING_DEFAULTS, **self._config.get("defaults", {})}
+        policies = {**POLICY_DEFAULTS, **self._config.get("policies", {})}
+        self._condition_map = {k.lower(): v for k, v in self._config.get("condition_mappings", {}).items()}
+        self._category_map = self._config.get("category_mappings", {})
+        self._default_condition = self._defaults["default_condition"]
+        self._default_category = self._defaults["default_category"]
+        
+        # Identical for every row, so built once and shared by all payloads (never mutated)
+        self._listing_policies = {
+            "fulfillmentPolicyId": policies["fulfillment_policy_id"],
+            "paymentPolicyId": policies["payment_policy_id"],
+            "returnPolicyId": policies["return_policy_id"]
+        }
+        self._package_weight = {
+            "weight": {
+                "value": self._defaults["default_weight"],
+                "unit": self._defaults["default_weight_unit"]
+            }
+        }
+        
+        # Validate the CSV header up front; rows are streamed later by process_inventory
+        self._validate_inventory_header()
         
-        # Load CSV data
-        self.inventory_data = self._load_inventory_data()
+        # SKUs already sent this run; bulk calls replace by SKU, so a repeat would overwrite an earlier item
+        self._seen_skus: set = set()
         
         # Track processed items
-        self.processed_items = []
-        self.failed_items = []
+        # One (index, title, sku, listing_id, error) tuple per item; report dicts are only built at the end
+        self._results: List[Tuple[Any, str, Optional[str], Optional[str], Optional[str]]] = []
+        
+        # eBay API limits are per application, so all workers draw from one bucket
+        self.rate_limiter = TokenBucket(CALLS_PER_SECOND)
     
-    def _load_inventory_data(self) -> pd.DataFrame:
-        """Load and validate inventory data from CSV."""
+    def _validate_inventory_header(self) -> None:
+        """Fail fast when the CSV lacks required columns."""
         try:
-            df = pd.read_csv(self.csv_file)
-            required_columns = ["Title", "Description", "Category", "Condition", "Photo Files"]
+            # utf-8-sig drops the byte-order mark Excel's "CSV UTF-8" export puts before the first header
+            with open(self.csv_file, newline='', encoding='utf-8-sig') as f:
+                self._columns = next(csv.reader(f), [])
             
-            missing_columns = [col for col in required_columns if col not in df.columns]
+            missing_columns = [col for col in REQUIRED_COLUMNS if col not in self._columns]
             if missing_columns:
                 raise ValueError(f"Missing required columns: {missing_columns}")
             
+        except Exception as e:
+            logger.error("Failed to load CSV file: %s", e)
+            raise
+    
+    def _read_inventory_chunks(self):
+        """Yield raw DataFrame chunks of the CSV, indexed by data row number."""
+        if pyarrow is None:
+            yield from pd.read_csv(self.csv_file, chunksize=INVENTORY_CHUNK_ROWS, encoding='utf-8-sig')
+            return
+        
+        # Arrow's streaming reader parses blocks on C++ threads. Text columns are pinned to strings
+        # so a later block can never contradict types inferred from the first one. Arrow skips a
+        # leading byte-order mark itself, so the header matches the names read above.
+        column_types = {col: pyarrow.float64() if col in NUMERIC_COLUMNS else pyarrow.string()
+                        for col in self._columns}
+        reader = pacsv.open_csv(
+            self.csv_file,
+            convert_options=pacsv.ConvertOptions(column_types=column_types, strings_can_be_null=True)
+        )
+        offset = 0
+        for batch in reader:
+            for start in range(0, batch.num_rows, INVENTORY_CHUNK_ROWS):
+                df = batch.slice(start, INVENTORY_CHUNK_ROWS).to_pandas()
+                df.index = pd.RangeIndex(offset, offset + len(df))
+                offset += len(df)
+                yield df
+    
+    def iter_inventory(self, start_index: int = 0, max_items: Optional[int] = None):
+        """Yield lists of (row index, record dict) for valid rows, one list per chunk.
+        
+        start_index and max_items count valid rows, as positions in the cleaned inventory;
+        a max_items of None or 0 means no limit.
+        """
+        seen = 0
+        remaining = max_items or None
+        for df in self._read_inventory_chunks():
             # Clean and validate data
             df = df.dropna(subset=["Title", "Description"])  # Remove rows without title/description
             df["Quantity"] = df["Quantity"].fillna(1).astype(int)
             df["Estimated Median Sale Price"] = df["Estimated Median Sale Price"].fillna(0).astype(float)
             
-            logger.info(f"Loaded {len(df)} items from {self.csv_file}")
-            return df
+            skip = min(max(start_index - seen, 0), len(df))
+            seen += len(df)
+            df = df.iloc[skip:]
+            if remaining is not None:
+                df = df.iloc[:remaining]
+                remaining -= len(df)
             
-        except Exception as e:
-            logger.error(f"Failed to load CSV file: {e}")
-            raise
+            if len(df):
+                # Plain dicts instead of iterrows(), which would allocate a Series per row
+                yield list(zip(df.index, df.to_dict(orient="records")))
+            if remaining == 0:
+                return
+    
+    def count_items(self) -> int:
+        """Number of valid inventory rows, counted without holding the whole CSV."""
+        return sum(len(records) for records in self.iter_inventory())
     
     def _load_config(self):
         """Load eBay configuration from JSON file."""
         try:
-            with open('ebay_categories.json', 'r') as f:
-                return json.load(f)
+            with open('ebay_categories.json', 'rb') as f:
+                return orjson.loads(f.read())
         except FileNotFoundError:
             logger.warning("ebay_categories.json not found, using default mappings")
             return {
@@ -193,22 +445,17 @@ class EbayLister:
     
     def _map_condition_to_ebay(self, condition: str) -> str:
         """Map condition values to eBay condition IDs."""
-        config = self._load_config()
-        condition_mapping = config.get("condition_mappings", {})
-        default_condition = config.get("defaults", {}).get("default_condition", "GOOD")
-        return condition_mapping.get(condition.lower(), default_condition)
+        return self._condition_map.get(condition.lower(), self._default_condition)
     
     def _map_category_to_ebay(self, category: str) -> str:
         """Map category paths to eBay category IDs."""
-        config = self._load_config()
-        category_mapping = config.get("category_mappings", {})
-        default_category = config.get("defaults", {}).get("default_category", "45100")
-        return category_mapping.get(category, default_category)
+        return self._category_map.get(category, self._default_category)
     
-    def _process_images(self, photo_files: str) -> List[str]:
+    def _process_images(self, photo_files: Any) -> List[str]:
         """Process image filenames into URLs."""
-        if not photo_files or pd.isna(photo_files):
+        if photo_files is None or pd.isna(photo_files) or not photo_files:
             return []
+        photo_files = str(photo_files)
         
         # Split by comma and clean up filenames
         filenames = [f.strip() for f in photo_files.split(",") if f.strip()]
@@ -220,17 +467,15 @@ class EbayLister:
         # For now, return filenames as-is (you'll need to upload to eBay Picture Services)
         return filenames
     
-    def _create_listing_payload(self, item: pd.Series) -> Dict[str, Any]:
+    def _create_listing_payload(self, item: Dict[str, Any]) -> Dict[str, Any]:
         """Create the eBay listing payload for an item."""
-        config = self._load_config()
-        defaults = config.get("defaults", {})
-        policies = config.get("policies", {})
+        defaults = self._defaults
         
         # Calculate auction end time
         end_time = datetime.now() + timedelta(days=self.auction_duration)
         
         # Process images
-        image_urls = self._process_images(str(item["Photo Files"]))
+        image_urls = self._process_images(item["Photo Files"])
         
         # Enhance with AI analysis if available
         enhanced_data = self._enhance_with_ai(item, image_urls)
@@ -238,14 +483,14 @@ class EbayLister:
         # Create the listing payload
         payload = {
             "product": {
-                "title": enhanced_data.get("title", item["Title"][:defaults.get("max_title_length", 80)]),
+                "title": enhanced_data.get("title", item["Title"][:defaults["max_title_length"]]),
                 "description": enhanced_data.get("description", item["Description"]),
                 "aspects": {
-                    "Brand": [enhanced_data.get("brand", item.get("eBay - Brand", defaults.get("default_brand", "Unbranded")))],
-                    "Type": [enhanced_data.get("type", item.get("eBay - Type", defaults.get("default_type", "Collectible")))],
-                    "Material": [enhanced_data.get("material", item.get("eBay - Material", defaults.get("default_material", "Mixed Materials")))],
-                    "Color": [enhanced_data.get("color", item.get("eBay - Color", defaults.get("default_color", "Multicolor")))],
-                    "Country/Region of Manufacture": [enhanced_data.get("country", item.get("eBay - Country/Region of Manufacture", defaults.get("default_country", "Unknown")))]
+                    "Brand": [enhanced_data.get("brand", item.get("eBay - Brand", defaults["default_brand"]))],
+                    "Type": [enhanced_data.get("type", item.get("eBay - Type", defaults["default_type"]))],
+                    "Material": [enhanced_data.get("material", item.get("eBay - Material", defaults["default_material"]))],
+                    "Color": [enhanced_data.get("color", item.get("eBay - Color", defaults["default_color"]))],
+                    "Country/Region of Manufacture": [enhanced_data.get("country", item.get("eBay - Country/Region of Manufacture", defaults["default_country"]))]
                 }
             },
             "availability": {
@@ -254,29 +499,20 @@ class EbayLister:
                 }
             },
             "condition": self._map_condition_to_ebay(str(item["Condition"])),
-            "packageWeightAndSize": {
-                "weight": {
-                    "value": defaults.get("default_weight", 1.0),
-                    "unit": defaults.get("default_weight_unit", "POUND")
-                }
-            },
+            "packageWeightAndSize": self._package_weight,
             "price": {
                 "value": enhanced_data.get("suggested_price", float(item["Estimated Median Sale Price"])),
-                "currency": defaults.get("currency", "USD")
+                "currency": defaults["currency"]
             },
             "format": "AUCTION",
-            "marketplaceId": defaults.get("marketplace_id", "EBAY_US"),
+            "marketplaceId": defaults["marketplace_id"],
             "categoryId": self._map_category_to_ebay(str(item["Category"])),
-            "listingPolicies": {
-                "fulfillmentPolicyId": policies.get("fulfillment_policy_id", "FREIGHT_SHIPPING"),
-                "paymentPolicyId": policies.get("payment_policy_id", "PAYMENT_IMMEDIATE"),
-                "returnPolicyId": policies.get("return_policy_id", "RETURN_30_DAYS")
-            }
+            "listingPolicies": self._listing_policies
         }
         
         # Add images if available
         if image_urls:
-            payload["product"]["imageUrls"] = image_urls[:defaults.get("max_images", 12)]
+            payload["product"]["imageUrls"] = image_urls[:defaults["max_images"]]
         
         # Set auction end time
         payload["auction"] = {
@@ -285,42 +521,43 @@ class EbayLister:
         
         return payload
     
-    def _enhance_with_ai(self, item: pd.Series, image_urls: List[str]) -> Dict[str, Any]:
-        """Enhance listing data with AI analysis if available."""
+    def _load_ai_config(self) -> Optional[Dict[str, Any]]:
+        """The user's configuration if it has an AI provider and key, else None."""
         if not self.ai_service or not self.user_config_manager:
+            return None
+        try:
+            config = self.user_config_manager._load_user_config(self.user_id)
+        except Exception as e:
+            logger.warning("Could not load configuration for user %s: %s", self.user_id, e)
+            config = None
+        if not config or not config.get("ai_provider") or not config.get("ai_api_key"):
+            logger.info("User %s has no AI configuration - using basic data", self.user_id)
+            return None
+        return config
+    
+    @staticmethod
+    def _local_image_paths(image_urls: List[str]) -> List[str]:
+        """Images AI analysis can read; external URLs would need downloading first."""
+        return [url for url in image_urls if not url.startswith("http")]
+    
+    def _enhance_with_ai(self, item: Dict[str, Any], image_urls: List[str]) -> Dict[str, Any]:
+        """Enhance listing data with AI analysis if available."""
+        # Remote-only rows are the common case, so they return before any other work
+        image_paths = self._local_image_paths(image_urls)
+        if not image_paths:
             return {}
         
-        # Check if user has AI configured
-        if not self.user_config_manager.has_valid_ai_config(self.user_id):
-            logger.info(f"User {self.user_id} has no AI configuration - using basic data")
+        user_config = self._ai_config
+        if user_config is None:
             return {}
         
         try:
-            # Get user's AI configuration
-            user_config = self.user_config_manager.get_user_config(self.user_id)
-            
-            # Convert image URLs to local paths for AI analysis
-            image_paths = []
-            for url in image_urls:
-                if url.startswith("http"):
-                    # For now, skip external URLs - would need to download
-                    continue
-                else:
-                    # Assume local file path
-                    image_paths.append(url)
-            
-            if not image_paths:
-                logger.warning("No local images found for AI analysis")
-                return {}
-            
             # Analyze with AI
-            logger.info(f"Analyzing {len(image_paths)} images with AI for user {self.user_id}")
+            logger.info("Analyzing %s images with AI for user %s", len(image_paths), self.user_id)
             ai_result = self.ai_service.analyze_item_images(image_paths, user_config)
             
             # Record usage
-            from ai_providers import UsageTracker
-            tracker = UsageTracker()
-            tracker.record_usage(self.user_id, user_config.get("ai_provider"))
+            self.ai_service.usage_tracker.record_usage(self.user_id, user_config.get("ai_provider"))
             
             # Extract and enhance data
             enhanced_data = {
@@ -334,113 +571,205 @@ class EbayLister:
                 "suggested_price": self._extract_price_from_ai(ai_result.get("value_range", ""))
             }
             
-            logger.info(f"AI enhancement completed for item: {enhanced_data.get('title', 'Unknown')}")
+            logger.info("AI enhancement completed for item: %s", enhanced_data.get('title', 'Unknown'))
             return enhanced_data
             
         except Exception as e:
-            logger.error(f"AI enhancement failed: {e}")
+            logger.error("AI enhancement failed: %s", e)
             return {}
     
-    def _extract_price_from_ai(self, value_range: str) -> float:
+    @staticmethod
+    def _extract_price_from_ai(value_range: str) -> float:
         """Extract numeric price from AI value range string."""
-        import re
-        
-        # Look for price patterns like "$10-50", "$25", "10-50", etc.
-        price_patterns = [
-            r'\$(\d+(?:\.\d{2})?)',  # $25, $25.50
-            r'(\d+(?:\.\d{2})?)\s*-\s*(\d+(?:\.\d{2})?)',  # 10-50, 25.50-75.25
-            r'\$(\d+(?:\.\d{2})?)\s*-\s*\$(\d+(?:\.\d{2})?)'  # $10-$50
-        ]
+        # A range ("$10-50", "10-50", "$10-$50") uses its midpoint
+        match = _PRICE_RANGE_RE.search(value_range)
+        if match:
+            return (float(match.group(1)) + float(match.group(2))) / 2
         
-        for pattern in price_patterns:
-            matches = re.findall(pattern, value_range)
-            if matches:
-                if len(matches[0]) == 2:  # Range
-                    try:
-                        min_price = float(matches[0][0])
-                        max_price = float(matches[0][1])
-                        return (min_price + max_price) / 2  # Use average
-                    except ValueError:
-                        continue
-                else:  # Single price
-                    try:
-                        return float(matches[0])
-                    except ValueError:
-                        continue
+        # Otherwise a single dollar amount ("$25", "$25.50")
+        match = _PRICE_SINGLE_RE.search(value_range)
+        if match:
+            return float(match.group(1))
         
         return 0.0  # Default if no price found
     
-    def create_listing(self, item: pd.Series) -> Optional[str]:
+    def _post(self, url: str, payload: Dict[str, Any]) -> requests.Response:
+        """Rate-limited authenticated POST; a token revoked or expired early gets one retry with a fresh one."""
+        for attempt in range(2):
+            token = self.auth.get_access_token()
+            self.rate_limiter.acquire()
+            response = self.auth.session.post(
+                url,
+                headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+                # Pre-encoded so requests skips its stdlib json.dumps; numpy scalars from pandas pass through
+                data=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+            )
+            if response.status_code != 401:
+                break
+            self.auth.invalidate_token(token)
+        return response
+    
+    def create_listing(self, item: Dict[str, Any]) -> Optional[str]:
         """Create a single eBay listing."""
         try:
             payload = self._create_listing_payload(item)
-            
-            # Use Inventory API to create listing
-            url = f"{self.auth.base_url}/sell/inventory/v1/inventory_item"
-            
-            response = requests.post(
-                url,
-                headers=self.auth.get_headers(),
-                json=payload
-            )
-            
-            if response.status_code == 201:
-                listing_id = response.json().get("listingId")
-                logger.info(f"Created listing {listing_id} for '{item['Title']}'")
-                return listing_id
-            else:
-                logger.error(f"Failed to create listing for '{item['Title']}': {response.status_code} - {response.text}")
-                return None
-                
+            return self._submit_listing(item, payload)
         except Exception as e:
-            logger.error(f"Error creating listing for '{item['Title']}': {e}")
+            logger.error("Error creating listing for '%s': %s", item['Title'], e)
             return None
     
+    def _submit_listing(self, item: Dict[str, Any], payload: Dict[str, Any]) -> Optional[str]:
+        """POST one prebuilt listing payload, returning the new listing id."""
+        # Use Inventory API to create listing
+        url = f"{self.auth.base_url}/sell/inventory/v1/inventory_item"
+        
+        response = self._post(url, payload)
+        
+        if response.status_code == 201:
+            listing_id = orjson.loads(response.content).get("listingId")
+            logger.info("Created listing %s for '%s'", listing_id, item['Title'])
+            return listing_id
+        else:
+            logger.error("Failed to create listing for '%s': %s - %s", item['Title'], response.status_code, response.text)
+            return None
+    
+    @staticmethod
+    def _sku(item: Dict[str, Any]) -> str:
+        """SKU for a CSV row: the sheet's SKU column when present, else one derived from the row's content.
+        
+        Bulk calls create or replace inventory items by SKU, so the derived SKU must stay the same
+        for the same item across runs and files and differ between items, which a row index does not.
+        """
+        sku = item.get("SKU")
+        if sku and not pd.isna(sku):
+            return str(sku)
+        content = "\x1f".join(str(item.get(column, "")) for column in SKU_CONTENT_COLUMNS)
+        return "RR-" + hashlib.blake2b(content.encode(), digest_size=8).hexdigest()
+    
+    def _create_listings_bulk(self, batch: List[Tuple[Any, Dict[str, Any], str, Dict[str, Any]]]) -> List[Tuple[Any, str, str, Optional[str], Optional[str]]]:
+        """Create up to BULK_BATCH_SIZE items in one call; only entries eBay reports as failed fall back to single POSTs.
+        
+        Returns (index, title, sku, listing_id, error) per item. The bulk endpoint creates inventory
+        items without listings, so bulk-created items succeed with no listing id.
+        """
+        url = f"{self.auth.base_url}/sell/inventory/v1/bulk_create_or_replace_inventory_item"
+        body = {"requests": [{"sku": sku, "locale": "en_US", **payload} for _, _, sku, payload in batch]}
+        
+        try:
+            response = self._post(url, body)
+        except Exception as e:
+            # eBay may have applied part of the batch before the failure, so nothing is re-sent;
+            # SKUs are stable, so rerunning the sheet replaces rather than duplicates these items
+            logger.error("Bulk listing request failed: %s", e)
+            return [(idx, item["Title"], sku, None, f"Bulk request failed: {e}") for idx, item, sku, _ in batch]
+        
+        if response.status_code not in (200, 207):
+            logger.error("Bulk listing request failed: %s - %s", response.status_code, response.text)
+            error = f"Bulk request failed: HTTP {response.status_code}"
+            return [(idx, item["Title"], sku, None, error) for idx, item, sku, _ in batch]
+        
+        statuses = {entry.get("sku"): entry for entry in orjson.loads(response.content).get("responses", [])}
+        results = []
+        for idx, item, sku, payload in batch:
+            status = statuses.get(sku)
+            if status is None:
+                results.append((idx, item["Title"], sku, None, "Missing from bulk response"))
+                continue
+            if status.get("statusCode") in (200, 201) and not status.get("errors"):
+                logger.info("Created inventory item %s for '%s'", sku, item['Title'])
+                results.append((idx, item["Title"], sku, None, None))
+                continue
+            
+            # eBay rejected this entry and did nothing with it, so a single POST is safe
+            try:
+                listing_id = self._submit_listing(item, payload)
+            except Exception as e:
+                logger.error("Error creating listing for '%s': %s", item['Title'], e)
+                listing_id = None
+            results.append((idx, item["Title"], sku, listing_id, None if listing_id else "Failed to create listing"))
+        return results
+    
+    def _record_result(self, idx: Any, title: str, sku: Optional[str], listing_id: Optional[str], error: Optional[str]) -> None:
+        """Store one item's outcome; the item succeeded when error is None."""
+        self._results.append((idx, title, sku, listing_id, error))
+    
+    @property
+    def processed_items(self) -> List[Dict[str, Any]]:
+        """Successful items in report form; listing_id is null for items created through the bulk endpoint."""
+        return [
+            {"index": idx, "title": title, "sku": sku, "listing_id": listing_id, "status": "success"}
+            for idx, title, sku, listing_id, error in self._results if error is None
+        ]
+    
+    @property
+    def failed_items(self) -> List[Dict[str, Any]]:
+        """Failed items in report form."""
+        return [
+            {"index": idx, "title": title, "sku": sku, "error": error}
+            for idx, title, sku, _, error in self._results if error is not None
+        ]
+    
     def process_inventory(self, start_index: int = 0, max_items: Optional[int] = None) -> None:
         """Process inventory items and create eBay listings."""
-        items_to_process = self.inventory_data.iloc[start_index:]
-        
+        # The total is what iter_inventory will actually yield: valid rows past start_index, capped at max_items
+        total = max(self.count_items() - start_index, 0)
         if max_items:
-            items_to_process = items_to_process.head(max_items)
+            total = min(total, max_items)
+        
+        # Redraws are coalesced to every 0.5s so progress stays cheap at high listing rates
+        with tqdm(total=total, desc="Creating eBay listings", unit="item",
+                  mininterval=0.5, smoothing=0.1) as pbar, \
+                ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            # Each chunk is fully dispatched before the next is parsed, so the first
+            # listings go out after one chunk and memory stays bounded by chunk size
+            for records in self.iter_inventory(start_index, max_items):
+                self._process_records(records, pool, pbar)
+            
+            logger.info("Processed %s items from %s", len(self._results), self.csv_file)
+    
+    def _build_payload(self, item: Dict[str, Any], upcoming: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build item's payload after starting the image encodes for the upcoming record's AI analysis."""
+        if upcoming is not None and self._ai_config is not None:
+            from ai_providers import prefetch_images
+            prefetch_images(self._local_image_paths(self._process_images(upcoming["Photo Files"])))
+        return self._create_listing_payload(item)
+    
+    def _process_records(self, records, pool: ThreadPoolExecutor, pbar: tqdm) -> None:
+        """List one chunk of records: build payloads concurrently, then post them in bulk batches."""
+        # Payloads (including AI enhancement) build concurrently; every BULK_BATCH_SIZE finished
+        # payloads go out as one bulk call, all drawing from the shared eBay rate limit
+        # Workers take builds in submission order, so the record a worker reaches after this one
+        # is MAX_WORKERS further on; its photos are encoded while this one's analysis is in flight
+        builds = {}
+        for i, (idx, item) in enumerate(records):
+            upcoming = records[i + MAX_WORKERS][1] if i + MAX_WORKERS < len(records) else None
+            builds[pool.submit(self._build_payload, item, upcoming)] = (idx, item)
+        
+        batch, posts = [], []
+        for future in as_completed(builds):
+            idx, item = builds[future]
+            sku = self._sku(item)
+            try:
+                if sku in self._seen_skus:
+                    raise ValueError(f"Duplicate SKU {sku}; it would replace an item already listed this run")
+                batch.append((idx, item, sku, future.result()))
+                self._seen_skus.add(sku)
+            except Exception as e:
+                self._record_result(idx, item["Title"], sku, None, str(e))
+                pbar.update(1)
+                continue
+            
+            if len(batch) == BULK_BATCH_SIZE:
+                posts.append(pool.submit(self._create_listings_bulk, batch))
+                batch = []
         
-        total_items = len(items_to_process)
+        if batch:
+            posts.append(pool.submit(self._create_listings_bulk, batch))
         
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console
-        ) as progress:
-            task = progress.add_task("Creating eBay listings...", total=total_items)
-            
-            for idx, item in items_to_process.iterrows():
-                try:
-                    listing_id = self.create_listing(item)
-                    
-                    if listing_id:
-                        self.processed_items.append({
-                            "index": idx,
-                            "title": item["Title"],
-                            "listing_id": listing_id,
-                            "status": "success"
-                        })
-                    else:
-                        self.failed_items.append({
-                            "index": idx,
-                            "title": item["Title"],
-                            "error": "Failed to create listing"
-                        })
-                    
-                    # Rate limiting - eBay has API limits
-                    time.sleep(1)
-                    
-                except Exception as e:
-                    self.failed_items.append({
-                        "index": idx,
-                        "title": item["Title"],
-                        "error": str(e)
-                    })
-                
-                progress.advance(task)
+        for future in as_completed(posts):
+            for result in future.result():
+                self._record_result(*result)
+                pbar.update(1)
     
     def generate_report(self) -> None:
         """Generate a summary report of the listing process."""
@@ -448,40 +777,45 @@ class EbayLister:
         console.print("[bold blue]eBay Listing Report[/bold blue]")
         console.print("="*60)
         
+        processed_items = self.processed_items
+        failed_items = self.failed_items
+        total = len(self._results)
+        success_rate = len(processed_items) / total * 100 if total else 0.0
+        
         # Summary table
         table = Table(title="Listing Summary")
         table.add_column("Metric", style="cyan")
         table.add_column("Count", style="magenta")
         
-        table.add_row("Total Items Processed", str(len(self.processed_items) + len(self.failed_items)))
-        table.add_row("Successful Listings", str(len(self.processed_items)))
-        table.add_row("Failed Listings", str(len(self.failed_items)))
-        table.add_row("Success Rate", f"{(len(self.processed_items) / (len(self.processed_items) + len(self.failed_items)) * 100):.1f}%")
+        table.add_row("Total Items Processed", str(total))
+        table.add_row("Successful Listings", str(len(processed_items)))
+        table.add_row("Failed Listings", str(len(failed_items)))
+        table.add_row("Success Rate", f"{success_rate:.1f}%")
         
         console.print(table)
         
         # Failed items details
-        if self.failed_items:
+        if failed_items:
             console.print("\n[bold red]Failed Items:[/bold red]")
-            for item in self.failed_items:
+            for item in failed_items:
                 console.print(f"• {item['title']}: {item['error']}")
         
         # Save detailed report
         report_data = {
             "timestamp": datetime.now().isoformat(),
             "summary": {
-                "total_processed": len(self.processed_items) + len(self.failed_items),
-                "successful": len(self.processed_items),
-                "failed": len(self.failed_items),
-                "success_rate": len(self.processed_items) / (len(self.processed_items) + len(self.failed_items)) * 100
+                "total_processed": total,
+                "successful": len(processed_items),
+                "failed": len(failed_items),
+                "success_rate": success_rate
             },
-            "processed_items": self.processed_items,
-            "failed_items": self.failed_items
+            "processed_items": processed_items,
+            "failed_items": failed_items
         }
         
         report_file = f"listing_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(report_file, 'w') as f:
-            json.dump(report_data, f, indent=2)
+        with open(report_file, 'wb') as f:
+            f.write(orjson.dumps(report_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
         
         console.print(f"\n[green]Detailed report saved to: {report_file}[/green]")
 
@@ -505,6 +839,8 @@ def main(csv_file: str, draft_mode: bool, start_index: int, max_items: Optional[
          dry_run: bool, user_id: str, setup_ai: bool):
     """Runway & Rivets eBay Lister - Automated mass listing tool."""
     
+    log_listener = _start_log_listener()
+    
     console.print(Panel.fit(
         "[bold blue]Runway & Rivets eBay Lister[/bold blue]\n"
         "Automated mass listing of vintage and collectible inventory",
@@ -538,11 +874,11 @@ def main(csv_file: str, draft_mode: bool, start_index: int, max_items: Optional[
                 ui = UserInterface()
                 ui.show_user_status(user_id)
             except Exception as e:
-                logger.warning(f"Could not show AI status: {e}")
+                logger.warning("Could not show AI status: %s", e)
         
         if dry_run:
             console.print("[yellow]DRY RUN MODE - No listings will be created[/yellow]")
-            console.print(f"Would process {len(lister.inventory_data)} items from {csv_file}")
+            console.print(f"Would process {lister.count_items()} items from {csv_file}")
             return
         
         # Process inventory
@@ -553,8 +889,11 @@ def main(csv_file: str, draft_mode: bool, start_index: int, max_items: Optional[
         
     except Exception as e:
         console.print(f"[red]Error: {e}[/red]")
-        logger.error(f"Application error: {e}")
+        logger.error("Application error: %s", e)
         sys.exit(1)
+    finally:
+        # Flush queued records before the process exits
+        log_listener.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Gunicorn settings for the PictoPost API
+Usage: gunicorn -c gunicorn_conf.py wsgi:app
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# One process per core: each gevent worker already multiplexes worker_connections clients and hands
+# disk IO to its hub threadpool, while every extra process adds its own SQLite connections, caches
+# and image process pool
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+# wsgi.py monkey-patches for gevent, letting uploads and file reads interleave within a worker
+worker_class = "gevent"
+worker_connections = 1000
+
+# Hold idle client connections open so the frontend's follow-up calls skip the TCP/TLS handshake;
+# idle sockets are cheap greenlets under gevent
+keepalive = int(os.getenv("KEEPALIVE", 30))
@@ -5,9 +5,18 @@ Handles image uploads and AI-powered eBay listing generation
 """
 
 import os
+import copy
 import json
+import asyncio
+import hashlib
+import threading
 import logging
 import requests
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from requests.adapters import HTTPAdapter
+import aiohttp
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from PIL import Image
@@ -16,11 +25,55 @@ import base64
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent image downloads for a single Gemini request
+IMAGE_FETCH_WORKERS = 16
+IMAGE_FETCH_TIMEOUT = 10
+
+# Worker processes for batch image optimization. Every web worker owns a pool, so the default stays
+# small and fixed instead of growing with the core count alongside the web worker count
+IMAGE_PROCESS_WORKERS = int(os.getenv("IMAGE_PROCESS_WORKERS", 2))
+
+# Model used for each provider; part of the response cache key
+PROVIDER_MODELS = {
+    "openai": "gpt-4o",
+    "claude": "claude-3-5-sonnet-20241022",
+    "gemini": "gemini-pro-vision",
+    "ollama": "llava",
+}
+
+# Number of parsed model responses kept for identical (provider, images, note) requests
+RESPONSE_CACHE_SIZE = 1024
+
+SYSTEM_PROMPT = """You are a resale AI assistant. Given images and a user message, you generate eBay-style listing data optimized for resale. Use general eBay categories. Include hashtags and keywords in the description. Group related items. Suggest better/missing photos if needed.
+
+Format your output in JSON with these keys:
+- title
+- description
+- category
+- condition
+- estimated_median_sale_price
+- brand
+- type
+- material
+- color
+- country_of_manufacture
+- suggested_photo_notes"""
+
 class ListingGenerator:
     """Handles AI-powered listing generation from images"""
     
     def __init__(self, ai_provider_manager=None):
         self.ai_provider_manager = ai_provider_manager
+        # Pooled keep-alive session shared by the parallel image downloads
+        self._http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=IMAGE_FETCH_WORKERS, pool_maxsize=IMAGE_FETCH_WORKERS)
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+        # LRU of parsed model output keyed by _cache_key, shared by the sync and async paths
+        self._response_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._img_pool: Optional[ProcessPoolExecutor] = None
+        self._img_pool_lock = threading.Lock()
         
     def generate_listing_from_images(
         self, 
@@ -42,69 +95,143 @@ class ListingGenerator:
             Dict containing generated listing data
         """
         try:
-            # Prepare the AI prompt
-            system_prompt = """You are a resale AI assistant. Given images and a user message, you generate eBay-style listing data optimized for resale. Use general eBay categories. Include hashtags and keywords in the description. Group related items. Suggest better/missing photos if needed.
+            cache_key = self._cache_key(user_id, ai_provider, image_urls, message)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return self._listing_result(cached, image_urls, message, user_id, ai_provider)
 
-Format your output in JSON with these keys:
-- title
-- description
-- category
-- condition
-- estimated_median_sale_price
-- brand
-- type
-- material
-- color
-- country_of_manufacture
-- suggested_photo_notes"""
-
-            user_prompt = json.dumps({
-                "images": image_urls,
-                "note": message
-            })
+            user_prompt = self._user_prompt(image_urls, message)
 
             # Get AI response based on provider
             if ai_provider == "openai":
-                response = self._call_openai(system_prompt, user_prompt)
+                response = self._call_openai(SYSTEM_PROMPT, user_prompt)
+            elif ai_provider == "claude":
+                response = self._call_claude(SYSTEM_PROMPT, user_prompt)
+            elif ai_provider == "gemini":
+                response = self._call_gemini(SYSTEM_PROMPT, user_prompt, image_urls)
+            elif ai_provider == "ollama":
+                response = self._call_ollama(SYSTEM_PROMPT, user_prompt)
+            else:
+                raise ValueError(f"Unsupported AI provider: {ai_provider}")
+
+            return self._listing_result(self._parse_response(response, cache_key), image_urls, message, user_id, ai_provider)
+
+        except Exception as e:
+            logger.error("Error generating listing: %s", e)
+            return self._failure_result(e)
+
+    async def agenerate_listing_from_images(
+        self,
+        image_urls: List[str],
+        message: str,
+        user_id: str,
+        ai_provider: str = "openai"
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_listing_from_images using the providers' async clients,
+        so several listings can be generated concurrently with asyncio.gather
+        """
+        try:
+            cache_key = self._cache_key(user_id, ai_provider, image_urls, message)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return self._listing_result(cached, image_urls, message, user_id, ai_provider)
+
+            user_prompt = self._user_prompt(image_urls, message)
+
+            if ai_provider == "openai":
+                response = await self._acall_openai(SYSTEM_PROMPT, user_prompt)
             elif ai_provider == "claude":
-                response = self._call_claude(system_prompt, user_prompt)
+                response = await self._acall_claude(SYSTEM_PROMPT, user_prompt)
             elif ai_provider == "gemini":
-                response = self._call_gemini(system_prompt, user_prompt, image_urls)
+                response = await self._acall_gemini(SYSTEM_PROMPT, user_prompt, image_urls)
             elif ai_provider == "ollama":
-                response = self._call_ollama(system_prompt, user_prompt)
+                response = await self._acall_ollama(SYSTEM_PROMPT, user_prompt)
             else:
                 raise ValueError(f"Unsupported AI provider: {ai_provider}")
 
-            # Parse the response
-            try:
-                parsed_response = json.loads(response)
-            except json.JSONDecodeError:
-                # If JSON parsing fails, try to extract JSON from the response
-                parsed_response = self._extract_json_from_response(response)
-
-            # Add metadata
-            listing_data = {
-                "user_id": user_id,
-                "image_urls": image_urls,
-                "user_message": message,
-                "ai_provider": ai_provider,
-                "generated_at": datetime.now().isoformat(),
-                **parsed_response
-            }
-
-            return {
-                "success": True,
-                "listing": listing_data,
-                "message": "Listing generated successfully"
-            }
+            return self._listing_result(self._parse_response(response, cache_key), image_urls, message, user_id, ai_provider)
 
         except Exception as e:
-            logger.error(f"Error generating listing: {e}")
-            return {
-                "success": False,
-                "error": str(e),
-                "message": "Failed to generate listing"
-            }
+            logger.error("Error generating listing: %s", e)
+            return self._failure_result(e)
+
+    @staticmethod
+    def _user_prompt(image_urls: List[str], message: str) -> str:
+        """Compact JSON user prompt carrying the image URLs and the user's note"""
+        return json.dumps({
+            "images": image_urls,
+            "note": message
+        }, separators=(',', ':'), ensure_ascii=False)
+
+    @staticmethod
+    def _cache_key(user_id: str, ai_provider: str, image_urls: List[str], message: str) -> str:
+        """SHA-256 over everything that determines the model output, scoped to the user"""
+        # Images stay in submission order, which the model sees (the first is the primary photo),
+        # and a user's generated listing is never served to anyone else
+        payload = {
+            "user": user_id,
+            "provider": ai_provider,
+            "model": PROVIDER_MODELS.get(ai_provider),
+            "system_prompt": SYSTEM_PROMPT,
+            "images": image_urls,
+            "note": message,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def _cached_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Copy of a previously parsed response for this key, if any"""
+        with self._cache_lock:
+            cached = self._response_cache.get(cache_key)
+            if cached is None:
+                return None
+            self._response_cache.move_to_end(cache_key)
+        return copy.deepcopy(cached)
+
+    def _parse_response(self, response: str, cache_key: str) -> Dict[str, Any]:
+        """Parse the model output, caching it unless it had to fall back to a placeholder listing"""
+        parsed_response = self._find_json(response)
+        if parsed_response is None:
+            return self._fallback_listing(response)
+
+        with self._cache_lock:
+            self._response_cache[cache_key] = copy.deepcopy(parsed_response)
+            self._response_cache.move_to_end(cache_key)
+            if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+        return parsed_response
+
+    def _listing_result(
+        self,
+        parsed_response: Dict[str, Any],
+        image_urls: List[str],
+        message: str,
+        user_id: str,
+        ai_provider: str
+    ) -> Dict[str, Any]:
+        """Wrap the parsed model output with listing metadata"""
+        listing_data = {
+            "user_id": user_id,
+            "image_urls": image_urls,
+            "user_message": message,
+            "ai_provider": ai_provider,
+            "generated_at": datetime.now().isoformat(),
+            **parsed_response
+        }
+
+        return {
+            "success": True,
+            "listing": listing_data,
+            "message": "Listing generated successfully"
+        }
+
+    @staticmethod
+    def _failure_result(error: Exception) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "error": str(error),
+            "message": "Failed to generate listing"
+        }
 
     def _call_openai(self, system_prompt: str, user_prompt: str) -> str:
         """Call OpenAI API"""
@@ -119,7 +246,7 @@ Format your output in JSON with these keys:
             client = openai.OpenAI(api_key=api_key)
             
             response = client.chat.completions.create(
-                model="gpt-4o",
+                model=PROVIDER_MODELS["openai"],
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
@@ -132,7 +259,7 @@ Format your output in JSON with these keys:
         except ImportError:
             raise ValueError("OpenAI library not installed. Run: pip install openai")
         except Exception as e:
-            logger.error(f"OpenAI API error: {e}")
+            logger.error("OpenAI API error: %s", e)
             raise
 
     def _call_claude(self, system_prompt: str, user_prompt: str) -> str:
@@ -147,10 +274,11 @@ Format your output in JSON with these keys:
             client = anthropic.Anthropic(api_key=api_key)
             
             response = client.messages.create(
-                model="claude-3-sonnet-20240229",
+                model=PROVIDER_MODELS["claude"],
                 max_tokens=1000,
+                system=self._claude_system(system_prompt),
                 messages=[
-                    {"role": "user", "content": f"{system_prompt}\n\n{user_prompt}"}
+                    {"role": "user", "content": user_prompt}
                 ]
             )
             
@@ -159,9 +287,14 @@ Format your output in JSON with these keys:
         except ImportError:
             raise ValueError("Anthropic library not installed. Run: pip install anthropic")
         except Exception as e:
-            logger.error(f"Claude API error: {e}")
+            logger.error("Claude API error: %s", e)
             raise
 
+    @staticmethod
+    def _claude_system(system_prompt: str) -> List[Dict[str, Any]]:
+        """System prompt as a cacheable block so repeat calls reuse Anthropic's prompt cache"""
+        return [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+
     def _call_gemini(self, system_prompt: str, user_prompt: str, image_urls: List[str]) -> str:
         """Call Google Gemini API with image support"""
         try:
@@ -172,22 +305,10 @@ Format your output in JSON with these keys:
                 raise ValueError("Google API key not found")
 
             genai.configure(api_key=api_key)
-            model = genai.GenerativeModel('gemini-pro-vision')
+            model = genai.GenerativeModel(PROVIDER_MODELS["gemini"])
             
             # Prepare images for Gemini
-            image_parts = []
-            for url in image_urls:
-                try:
-                    # Download and process image
-                    response = requests.get(url)
-                    response.raise_for_status()
-                    image_data = response.content
-                    image_parts.append({
-                        "mime_type": "image/jpeg",
-                        "data": image_data
-                    })
-                except Exception as e:
-                    logger.warning(f"Failed to process image {url}: {e}")
+            image_parts = self._fetch_images(image_urls)
 
             # Create prompt
             full_prompt = f"{system_prompt}\n\n{user_prompt}"
@@ -198,9 +319,33 @@ Format your output in JSON with these keys:
         except ImportError:
             raise ValueError("Google Generative AI library not installed. Run: pip install google-generativeai")
         except Exception as e:
-            logger.error(f"Gemini API error: {e}")
+            logger.error("Gemini API error: %s", e)
             raise
 
+    def _fetch_images(self, image_urls: List[str]) -> List[Dict[str, Any]]:
+        """Download images concurrently, keeping their original order and skipping failures"""
+        if not image_urls:
+            return []
+
+        def fetch(url: str) -> requests.Response:
+            response = self._http.get(url, timeout=IMAGE_FETCH_TIMEOUT)
+            response.raise_for_status()
+            return response
+
+        image_parts = []
+        with ThreadPoolExecutor(max_workers=min(IMAGE_FETCH_WORKERS, len(image_urls))) as pool:
+            futures = [(url, pool.submit(fetch, url)) for url in image_urls]
+            for url, future in futures:
+                try:
+                    response = future.result()
+                    image_parts.append({
+                        "mime_type": response.headers.get("Content-Type", "image/jpeg").split(";")[0],
+                        "data": response.content
+                    })
+                except Exception as e:
+                    logger.warning("Failed to process image %s: %s", url, e)
+        return image_parts
+
     def _call_ollama(self, system_prompt: str, user_prompt: str) -> str:
         """Call local Ollama API"""
         try:
@@ -211,7 +356,7 @@ Format your output in JSON with these keys:
             response = requests.post(
                 f"{endpoint}/api/generate",
                 json={
-                    "model": "llava",
+                    "model": PROVIDER_MODELS["ollama"],
                     "prompt": f"{system_prompt}\n\n{user_prompt}",
                     "stream": False
                 }
@@ -221,83 +366,272 @@ Format your output in JSON with these keys:
             return response.json().get("response", "{}")
             
         except Exception as e:
-            logger.error(f"Ollama API error: {e}")
+            logger.error("Ollama API error: %s", e)
+            raise
+
+    async def _acall_openai(self, system_prompt: str, user_prompt: str) -> str:
+        """Call OpenAI API through the async client"""
+        try:
+            import openai
+
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("OpenAI API key not found")
+
+            async with openai.AsyncOpenAI(api_key=api_key) as client:
+                response = await client.chat.completions.create(
+                    model=PROVIDER_MODELS["openai"],
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.3
+                )
+
+            return response.choices[0].message.content or "{}"
+
+        except ImportError:
+            raise ValueError("OpenAI library not installed. Run: pip install openai")
+        except Exception as e:
+            logger.error("OpenAI API error: %s", e)
+            raise
+
+    async def _acall_claude(self, system_prompt: str, user_prompt: str) -> str:
+        """Call Anthropic Claude API through the async client"""
+        try:
+            import anthropic
+
+            api_key = os.getenv("ANTHROPIC_API_KEY")
+            if not api_key:
+                raise ValueError("Anthropic API key not found")
+
+            async with anthropic.AsyncAnthropic(api_key=api_key) as client:
+                response = await client.messages.create(
+                    model=PROVIDER_MODELS["claude"],
+                    max_tokens=1000,
+                    system=self._claude_system(system_prompt),
+                    messages=[
+                        {"role": "user", "content": user_prompt}
+                    ]
+                )
+
+            return response.content[0].text or "{}"
+
+        except ImportError:
+            raise ValueError("Anthropic library not installed. Run: pip install anthropic")
+        except Exception as e:
+            logger.error("Claude API error: %s", e)
+            raise
+
+    async def _acall_gemini(self, system_prompt: str, user_prompt: str, image_urls: List[str]) -> str:
+        """Call Google Gemini API with image support without blocking the event loop"""
+        try:
+            import google.generativeai as genai
+
+            api_key = os.getenv("GOOGLE_API_KEY")
+            if not api_key:
+                raise ValueError("Google API key not found")
+
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel(PROVIDER_MODELS["gemini"])
+
+            image_parts = await self._afetch_images(image_urls)
+            full_prompt = f"{system_prompt}\n\n{user_prompt}"
+
+            response = await model.generate_content_async([full_prompt] + image_parts)
+            return response.text or "{}"
+
+        except ImportError:
+            raise ValueError("Google Generative AI library not installed. Run: pip install google-generativeai")
+        except Exception as e:
+            logger.error("Gemini API error: %s", e)
+            raise
+
+    async def _afetch_images(self, image_urls: List[str]) -> List[Dict[str, Any]]:
+        """Download images concurrently on the event loop, keeping their order and skipping failures"""
+        if not image_urls:
+            return []
+
+        timeout = aiohttp.ClientTimeout(total=IMAGE_FETCH_TIMEOUT)
+        connector = aiohttp.TCPConnector(limit=IMAGE_FETCH_WORKERS)
+
+        async def fetch(session: aiohttp.ClientSession, url: str) -> Dict[str, Any]:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                return {
+                    "mime_type": response.content_type or "image/jpeg",
+                    "data": await response.read()
+                }
+
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            results = await asyncio.gather(*(fetch(session, url) for url in image_urls), return_exceptions=True)
+
+        image_parts = []
+        for url, result in zip(image_urls, results):
+            if isinstance(result, Exception):
+                logger.warning("Failed to process image %s: %s", url, result)
+            else:
+                image_parts.append(result)
+        return image_parts
+
+    async def _acall_ollama(self, system_prompt: str, user_prompt: str) -> str:
+        """Call local Ollama API without blocking the event loop"""
+        try:
+            endpoint = os.getenv("OLLAMA_ENDPOINT", "http://localhost:11434")
+
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    f"{endpoint}/api/generate",
+                    json={
+                        "model": PROVIDER_MODELS["ollama"],
+                        "prompt": f"{system_prompt}\n\n{user_prompt}",
+                        "stream": False
+                    }
+                ) as response:
+                    response.raise_for_status()
+                    body = await response.json()
+
+            return body.get("response", "{}")
+
+        except Exception as e:
+            logger.error("Ollama API error: %s", e)
             raise
 
-    def _extract_json_from_response(self, response: str) -> Dict[str, Any]:
-        """Extract JSON from AI response if it's not pure JSON"""
+    @staticmethod
+    def _find_json(response: str) -> Optional[Dict[str, Any]]:
+        """Parse the response as JSON, or the outermost {...} span within it; None if neither parses"""
+        try:
+            return json.loads(response)
+        except json.JSONDecodeError:
+            pass
         try:
             # Try to find JSON in the response
             start = response.find('{')
             end = response.rfind('}') + 1
-            
             if start != -1 and end != 0:
-                json_str = response[start:end]
-                return json.loads(json_str)
-            else:
-                # If no JSON found, create a basic structure
-                return {
-                    "title": "Generated Listing",
-                    "description": response,
-                    "category": "Collectibles",
-                    "condition": "Used",
-                    "estimated_median_sale_price": "Unknown",
-                    "brand": "Unknown",
-                    "type": "Unknown",
-                    "material": "Unknown",
-                    "color": "Unknown",
-                    "country_of_manufacture": "Unknown",
-                    "suggested_photo_notes": "No specific photo suggestions"
-                }
+                return json.loads(response[start:end])
         except Exception as e:
-            logger.error(f"Failed to extract JSON: {e}")
-            return {
-                "title": "Generated Listing",
-                "description": response,
-                "category": "Collectibles",
-                "condition": "Used",
-                "estimated_median_sale_price": "Unknown",
-                "brand": "Unknown",
-                "type": "Unknown",
-                "material": "Unknown",
-                "color": "Unknown",
-                "country_of_manufacture": "Unknown",
-                "suggested_photo_notes": "No specific photo suggestions"
-            }
+            logger.error("Failed to extract JSON: %s", e)
+        return None
+
+    @staticmethod
+    def _fallback_listing(response: str) -> Dict[str, Any]:
+        """Basic listing structure wrapping a response that contained no usable JSON"""
+        return {
+            "title": "Generated Listing",
+            "description": response,
+            "category": "Collectibles",
+            "condition": "Used",
+            "estimated_median_sale_price": "Unknown",
+            "brand": "Unknown",
+            "type": "Unknown",
+            "material": "Unknown",
+            "color": "Unknown",
+            "country_of_manufacture": "Unknown",
+            "suggested_photo_notes": "No specific photo suggestions"
+        }
 
     def validate_image(self, image_data: bytes) -> bool:
         """Validate uploaded image"""
-        try:
-            image = Image.open(io.BytesIO(image_data))
-            # Check if it's a supported format
-            if image.format not in ['JPEG', 'PNG', 'GIF', 'BMP']:
-                return False
-            # Check file size (max 10MB)
-            if len(image_data) > 10 * 1024 * 1024:
-                return False
-            return True
-        except Exception as e:
-            logger.error(f"Image validation error: {e}")
-            return False
+        return _open_valid_image(image_data) is not None
 
     def optimize_image(self, image_data: bytes, max_size: tuple = (800, 800)) -> bytes:
         """Optimize image for web display"""
-        try:
-            image = Image.open(io.BytesIO(image_data))
-            
-            # Convert to RGB if necessary
-            if image.mode in ('RGBA', 'LA', 'P'):
-                image = image.convert('RGB')
-            
-            # Resize if too large
-            if image.size[0] > max_size[0] or image.size[1] > max_size[1]:
-                image.thumbnail(max_size, Image.Resampling.LANCZOS)
-            
-            # Save optimized image
-            output = io.BytesIO()
-            image.save(output, format='JPEG', quality=85, optimize=True)
-            return output.getvalue()
-            
-        except Exception as e:
-            logger.error(f"Image optimization error: {e}")
-            return image_data  # Return original if optimization fails 
\ No newline at end of file
+        return _optimize_image(image_data, max_size)
+
+    def validate_and_optimize(self, image_data: bytes, max_size: tuple = (800, 800)) -> Optional[bytes]:
+        """Validate and optimize an upload from a single decode; None if the image is invalid"""
+        return _validate_and_optimize(image_data, max_size)
+
+    def _image_pool(self) -> ProcessPoolExecutor:
+        """Process pool for CPU-bound image work, created on first use"""
+        if self._img_pool is None:
+            with self._img_pool_lock:
+                if self._img_pool is None:
+                    # Spawned, not forked: the pool starts lazily inside a process that already
+                    # runs request threads, whose held locks a fork would copy into the children
+                    self._img_pool = ProcessPoolExecutor(max_workers=IMAGE_PROCESS_WORKERS,
+                                                         mp_context=get_context("spawn"))
+        return self._img_pool
+
+    def optimize_images_batch(self, images: List[bytes], max_size: tuple = (800, 800)) -> List[bytes]:
+        """Optimize several images in parallel across processes, preserving order"""
+        return self._map_images(_optimize_image, images, max_size)
+
+    def validate_and_optimize_batch(self, images: List[bytes], max_size: tuple = (800, 800)) -> List[Optional[bytes]]:
+        """validate_and_optimize over several images in parallel across processes, preserving order"""
+        return self._map_images(_validate_and_optimize, images, max_size)
+
+    def _map_images(self, fn, images: List[bytes], max_size: tuple) -> list:
+        if len(images) <= 1:
+            # Not worth the pickling round trip for a single image
+            return [fn(image_data, max_size) for image_data in images]
+        return list(self._image_pool().map(fn, images, [max_size] * len(images)))
+
+    async def optimize_image_async(self, image_data: bytes, max_size: tuple = (800, 800)) -> bytes:
+        """Optimize an image in the process pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._image_pool(), _optimize_image, image_data, max_size)
+
+
+# Formats accepted for uploads, and the upload size limit
+SUPPORTED_IMAGE_FORMATS = frozenset(('JPEG', 'PNG', 'GIF', 'BMP'))
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+
+def _open_valid_image(image_data: bytes) -> Optional[Image.Image]:
+    """Open an upload if it is a supported format within the size limit; pixels stay undecoded"""
+    # Check file size (max 10MB) before touching the bytes
+    if len(image_data) > MAX_IMAGE_BYTES:
+        return None
+    try:
+        image = Image.open(io.BytesIO(image_data))
+    except Exception as e:
+        logger.error("Image validation error: %s", e)
+        return None
+    # Check if it's a supported format
+    if image.format not in SUPPORTED_IMAGE_FORMATS:
+        return None
+    return image
+
+
+def _encode_optimized(image: Image.Image, max_size: tuple) -> bytes:
+    """Resize an opened image to fit max_size and encode it as JPEG"""
+    # Palette images only resize with NEAREST, so expand them before scaling
+    if image.mode == 'P':
+        image = image.convert('RGB')
+    
+    # Resize if too large; thumbnail decodes JPEGs at reduced scale and pre-shrinks
+    # with reduce() before the LANCZOS pass, so huge inputs never run LANCZOS at full size
+    if image.size[0] > max_size[0] or image.size[1] > max_size[1]:
+        image.thumbnail(max_size, Image.Resampling.LANCZOS)
+    
+    # Drop alpha after resizing so the conversion only touches the output pixels
+    if image.mode in ('RGBA', 'LA'):
+        image = image.convert('RGB')
+    
+    # Save optimized image
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=85, optimize=True)
+    return output.getvalue()
+
+
+def _optimize_image(image_data: bytes, max_size: tuple) -> bytes:
+    """Resize and re-encode an image as JPEG; module-level so process pool workers can run it"""
+    try:
+        return _encode_optimized(Image.open(io.BytesIO(image_data)), max_size)
+    except Exception as e:
+        logger.error("Image optimization error: %s", e)
+        return image_data  # Return original if optimization fails
+
+
+def _validate_and_optimize(image_data: bytes, max_size: tuple) -> Optional[bytes]:
+    """Validate and optimize reusing the one opened image, so the pixels are decoded once"""
+    image = _open_valid_image(image_data)
+    if image is None:
+        return None
+    try:
+        return _encode_optimized(image, max_size)
+    except Exception as e:
+        logger.error("Image optimization error: %s", e)
+        return image_data  # Return original if optimization fails
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def pytest_configure(config):
+    # app.py and the stores create their directories and databases relative to the working directory
+    os.chdir(tempfile.mkdtemp(prefix="backend-tests-"))
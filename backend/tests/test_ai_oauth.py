@@ -0,0 +1,44 @@
+import socket
+import subprocess
+import sys
+import urllib.request
+
+import pytest
+
+import ai_oauth
+from conftest import BACKEND_DIR
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    handler = ai_oauth.AIOAuthHandler()
+    handler.callback_port = _free_port()
+
+    # Stand in for the user finishing the login in their browser
+    def browser_login(url):
+        urllib.request.urlopen(f"http://localhost:{handler.callback_port}/callback?code=abcdefgh123&state=openai")
+        return True
+
+    monkeypatch.setattr(ai_oauth.webbrowser, "open", browser_login)
+    yield handler
+    handler.shutdown()
+
+
+def test_sync_authenticate_keeps_one_callback_server(handler):
+    assert handler.authenticate_user("openai") == "openai_access_token_abcdefgh"
+    runner = handler._runner
+
+    assert handler.authenticate_user("openai") == "openai_access_token_abcdefgh"
+    assert handler._runner is runner
+
+
+def test_user_config_does_not_import_aiohttp():
+    code = "import sys, user_config; print('aiohttp' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,47 @@
+import orjson
+
+import ai_providers
+from ai_providers import AIProviderManager, UsageTracker
+
+
+def test_usage_tracker_imports_legacy_json_counts(tmp_path):
+    legacy = tmp_path / "ai_usage.json"
+    key = f"u1_openai_{ai_providers._today()}"
+    legacy.write_bytes(orjson.dumps({key: 7, "u2_anthropic_2025-01-01": 3}))
+
+    tracker = UsageTracker(AIProviderManager(), db_path=str(tmp_path / "ai_usage.db"), legacy_path=str(legacy))
+
+    assert tracker.get_usage_stats("u1", "openai")["current_usage"] == 7
+    assert not legacy.exists()
+    assert (tmp_path / "ai_usage.json.imported").exists()
+
+    tracker.record_usage("u1", "openai")
+    assert tracker.get_usage_stats("u1", "openai")["current_usage"] == 8
+
+
+def _images(*hashes):
+    return [ai_providers.EncodedImage(f"data-{h}", 800, h) for h in hashes]
+
+
+def test_response_cache_is_scoped_to_the_user(tmp_path):
+    cache = ai_providers.ResponseCache(str(tmp_path / "ai_cache.db"), near_duplicate_bits=0)
+    cache.put("alice", "openai", _images(1, 2), {"title": "Alice's lamp"})
+
+    assert cache.get("alice", "openai", _images(1, 2)) == {"title": "Alice's lamp"}
+    assert cache.get("bob", "openai", _images(1, 2)) is None
+    assert cache.get("alice", "anthropic", _images(1, 2)) is None
+    assert cache.get("alice", "openai", _images(1, 3)) is None
+
+
+def test_response_cache_near_duplicates_are_opt_in_and_per_user(tmp_path):
+    db_path = str(tmp_path / "ai_cache.db")
+    stored = [ai_providers.EncodedImage("original", 800, 0b1010)]
+    retake = [ai_providers.EncodedImage("retake", 800, 0b1011)]
+
+    exact_only = ai_providers.ResponseCache(db_path, near_duplicate_bits=0)
+    exact_only.put("alice", "openai", stored, {"title": "Lamp"})
+    assert exact_only.get("alice", "openai", retake) is None
+
+    fuzzy = ai_providers.ResponseCache(db_path, near_duplicate_bits=2)
+    assert fuzzy.get("alice", "openai", retake) == {"title": "Lamp"}
+    assert fuzzy.get("bob", "openai", retake) is None
@@ -0,0 +1,46 @@
+import pytest
+
+import app as backend_app
+
+
+@pytest.fixture
+def client():
+    return backend_app.app.test_client()
+
+
+def test_ai_setup_payload_omits_cli_only_text(client):
+    response = client.get("/api/ai/setup", headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    for provider in response.get_json()["providers"].values():
+        assert "tips" not in provider
+        assert "free_tier_note" not in provider
+
+
+@pytest.mark.parametrize("encoding", ["identity", "gzip"])
+def test_ai_setup_answers_304_for_its_own_etag(client, encoding):
+    first = client.get("/api/ai/setup", headers={"Accept-Encoding": encoding})
+    etag = first.headers["ETag"]
+
+    assert backend_app._AI_SETUP_ETAG in etag
+    repeat = client.get("/api/ai/setup", headers={"Accept-Encoding": encoding, "If-None-Match": etag})
+    assert repeat.status_code == 304
+
+
+def test_compressed_draft_listing_revalidates_to_304(client):
+    # Enough drafts that the listing clears COMPRESS_MIN_SIZE and is gzipped on the fly
+    backend_app.draft_store.record("etag_user", [f"2024_{i:04d}_photo.jpg" for i in range(20)], "added", 1234)
+    headers = {"Accept": "application/json", "Accept-Encoding": "gzip"}
+
+    first = client.get("/api/users/etag_user/drafts", headers=headers)
+    assert first.headers["Content-Encoding"] == "gzip"
+    etag = first.headers["ETag"]
+    assert etag.endswith(':gzip"')
+
+    repeat = client.get("/api/users/etag_user/drafts", headers={**headers, "If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.headers["ETag"] == etag
+
+    backend_app.draft_store.record("etag_user", ["2024_new_photo.jpg"], "added", 10)
+    changed = client.get("/api/users/etag_user/drafts", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
@@ -0,0 +1,51 @@
+from draft_store import DraftStore
+
+
+def _is_image(name):
+    return name.lower().endswith((".jpg", ".png"))
+
+
+def _store(tmp_path):
+    return DraftStore(str(tmp_path / "drafts"), _is_image, db_path=str(tmp_path / "drafts.db"))
+
+
+def test_added_drafts_are_listed_newest_first(tmp_path):
+    store = _store(tmp_path)
+    store.record("alice", ["a.jpg"], "added", 100)
+    store.record("alice", ["b.jpg"], "added", 200)
+
+    drafts = store.list_drafts("alice")
+    assert [d["filename"] for d in drafts] == ["b.jpg", "a.jpg"]
+    assert [d["size"] for d in drafts] == [200, 100]
+    assert store.count_drafts("alice") == 2
+    assert store.count_drafts("bob") == 0
+
+
+def test_deleted_and_processed_drafts_leave_the_listing(tmp_path):
+    store = _store(tmp_path)
+    store.record("alice", ["a.jpg", "b.jpg", "c.jpg"], "added", 10)
+    store.record("alice", ["a.jpg"], "deleted")
+    store.record("alice", ["b.jpg"], "processed")
+
+    assert [d["filename"] for d in store.list_drafts("alice")] == ["c.jpg"]
+    assert store.count_drafts("alice") == 1
+
+
+def test_version_changes_with_every_event(tmp_path):
+    store = _store(tmp_path)
+    before = store.version("alice")
+    store.record("alice", ["a.jpg"], "added", 10)
+    after_add = store.version("alice")
+    store.record("alice", ["a.jpg"], "deleted")
+
+    assert len({before, after_add, store.version("alice")}) == 3
+
+
+def test_existing_files_are_backfilled_once(tmp_path):
+    user_dir = tmp_path / "drafts" / "alice"
+    user_dir.mkdir(parents=True)
+    (user_dir / "old.jpg").write_bytes(b"12345")
+    (user_dir / "notes.txt").write_bytes(b"x")
+
+    store = _store(tmp_path)
+    assert [(d["filename"], d["size"]) for d in store.list_drafts("alice")] == [("old.jpg", 5)]
@@ -0,0 +1,181 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import orjson
+import pytest
+
+import ebay_lister
+
+
+def test_session_never_replays_listing_posts_after_server_errors():
+    retry = ebay_lister._build_session().get_adapter("https://api.ebay.com").max_retries
+
+    assert not retry.is_retry("POST", 502)
+    assert not retry.is_retry("POST", 500)
+    assert retry.is_retry("POST", 429)
+    assert retry.is_retry("GET", 503)
+    assert retry.is_retry("PUT", 502)
+    assert isinstance(retry.new(), ebay_lister._EbayRetry)
+
+
+class _Response:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.content = orjson.dumps(body)
+        self.text = self.content.decode()
+
+
+def _bare_lister():
+    lister = object.__new__(ebay_lister.EbayLister)
+    lister.auth = SimpleNamespace(base_url="https://api.ebay.com")
+    lister._results = []
+    lister._seen_skus = set()
+    lister._ai_config = None
+    lister.image_base_url = ""
+    return lister
+
+
+def _batch(*titles):
+    return [
+        (idx, {"Title": title}, f"SKU-{idx}", {"product": {"title": title}})
+        for idx, title in enumerate(titles)
+    ]
+
+
+def test_bulk_falls_back_only_for_entries_marked_failed():
+    lister = _bare_lister()
+    lister._post = lambda url, body: _Response(207, {"responses": [
+        {"sku": "SKU-0", "statusCode": 200},
+        {"sku": "SKU-1", "statusCode": 400, "errors": [{"message": "bad category"}]},
+    ]})
+    resent = []
+    lister._submit_listing = lambda item, payload: resent.append(item["Title"]) or "L-1"
+
+    results = lister._create_listings_bulk(_batch("lamp", "chair", "desk"))
+
+    assert resent == ["chair"]
+    assert results == [
+        (0, "lamp", "SKU-0", None, None),
+        (1, "chair", "SKU-1", "L-1", None),
+        (2, "desk", "SKU-2", None, "Missing from bulk response"),
+    ]
+
+
+def test_bulk_exception_does_not_resend_items():
+    lister = _bare_lister()
+
+    def fail(url, body):
+        raise ConnectionError("reset")
+
+    lister._post = fail
+    lister._submit_listing = lambda item, payload: pytest.fail("bulk items were re-sent")
+
+    results = lister._create_listings_bulk(_batch("lamp", "chair"))
+
+    assert [error for *_, error in results] == ["Bulk request failed: reset"] * 2
+    for result in results:
+        lister._record_result(*result)
+    assert lister.processed_items == []
+    assert [item["sku"] for item in lister.failed_items] == ["SKU-0", "SKU-1"]
+
+
+def test_derived_sku_follows_content_not_row_position():
+    item = {"Title": "lamp", "Description": "brass", "Category": "Home", "Condition": "Used",
+            "Photo Files": "a.jpg", "Quantity": 1, "Estimated Median Sale Price": 20.0}
+
+    assert ebay_lister.EbayLister._sku(item) == ebay_lister.EbayLister._sku(dict(item))
+    assert ebay_lister.EbayLister._sku(item) != ebay_lister.EbayLister._sku({**item, "Title": "desk"})
+    assert ebay_lister.EbayLister._sku(item) != ebay_lister.EbayLister._sku({**item, "Quantity": 2})
+    assert ebay_lister.EbayLister._sku(item) != ebay_lister.EbayLister._sku(
+        {**item, "Estimated Median Sale Price": 25.0})
+    assert ebay_lister.EbayLister._sku({**item, "SKU": "A-7"}) == "A-7"
+
+
+def test_repeated_sku_in_a_run_fails_instead_of_replacing_the_first_item():
+    lister = _bare_lister()
+    lister._create_listing_payload = lambda item: {"product": {"title": item["Title"]}}
+    sent = []
+    lister._create_listings_bulk = lambda batch: [
+        sent.append(sku) or (idx, item["Title"], sku, None, None) for idx, item, sku, _ in batch
+    ]
+    records = [(0, {"Title": "lamp", "SKU": "A-1"}), (1, {"Title": "lamp copy", "SKU": "A-1"})]
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        lister._process_records(records, pool, MagicMock())
+
+    assert sent == ["A-1"]
+    assert len(lister.processed_items) == 1
+    assert [item["sku"] for item in lister.failed_items] == ["A-1"]
+    assert "Duplicate SKU" in lister.failed_items[0]["error"]
+
+
+def _inventory_lister(tmp_path, rows):
+    csv_file = tmp_path / "inventory.csv"
+    header = "Title,Description,Category,Condition,Photo Files,Quantity,Estimated Median Sale Price\n"
+    csv_file.write_text(header + "".join(f"{title},desc,Home,Used,a.jpg,1,5\n" for title in rows))
+    lister = _bare_lister()
+    lister.csv_file = str(csv_file)
+    lister._validate_inventory_header()
+    return lister
+
+
+def test_zero_max_items_means_no_limit(tmp_path):
+    lister = _inventory_lister(tmp_path, ["lamp", "chair", "desk"])
+
+    def titles(**kwargs):
+        return [item["Title"] for records in lister.iter_inventory(**kwargs) for _, item in records]
+
+    assert titles(max_items=0) == ["lamp", "chair", "desk"]
+    assert titles(start_index=1, max_items=1) == ["chair"]
+
+
+def test_progress_total_counts_only_rows_that_will_be_listed(tmp_path, monkeypatch):
+    lister = _inventory_lister(tmp_path, ["lamp", "chair", "desk"])
+    totals = []
+    monkeypatch.setattr(ebay_lister, "tqdm", lambda total, **kwargs: totals.append(total) or MagicMock())
+    monkeypatch.setattr(lister, "_process_records", lambda records, pool, pbar: None, raising=False)
+
+    lister.process_inventory(start_index=1)
+    lister.process_inventory(start_index=1, max_items=5)
+    lister.process_inventory(max_items=2)
+
+    assert totals == [2, 2, 2]
+
+
+@pytest.mark.parametrize("use_pyarrow", [True, False])
+def test_inventory_with_byte_order_mark_loads(tmp_path, monkeypatch, use_pyarrow):
+    if not use_pyarrow:
+        monkeypatch.setattr(ebay_lister, "pyarrow", None)
+    csv_file = tmp_path / "inventory.csv"
+    csv_file.write_text(
+        "Title,Description,Category,Condition,Photo Files,Quantity,Estimated Median Sale Price\n"
+        "lamp,desc,Home,Used,a.jpg,1,5\n",
+        encoding="utf-8-sig",
+    )
+    lister = _bare_lister()
+    lister.csv_file = str(csv_file)
+
+    lister._validate_inventory_header()
+
+    assert lister._columns[0] == "Title"
+    assert [item["Title"] for records in lister.iter_inventory() for _, item in records] == ["lamp"]
+
+
+def test_records_prefetch_the_photos_their_worker_analyzes_next(monkeypatch):
+    import ai_providers
+
+    lister = _bare_lister()
+    lister._ai_config = {"ai_provider": "openai", "ai_api_key": "key"}
+    lister._create_listing_payload = lambda item: {}
+    lister._create_listings_bulk = lambda batch: [(idx, item["Title"], sku, None, None) for idx, item, sku, _ in batch]
+    prefetched = []
+    monkeypatch.setattr(ai_providers, "prefetch_images", prefetched.append)
+    monkeypatch.setattr(ebay_lister, "MAX_WORKERS", 2)
+    records = [(i, {"Title": f"item {i}", "SKU": f"S-{i}", "Photo Files": f"{i}.jpg, https://cdn/{i}.jpg"})
+               for i in range(4)]
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        lister._process_records(records, pool, MagicMock())
+
+    assert sorted(prefetched) == [["2.jpg"], ["3.jpg"]]
@@ -0,0 +1,40 @@
+import io
+
+from PIL import Image
+
+import listing_generator
+
+
+def _jpeg(size):
+    output = io.BytesIO()
+    Image.new("RGB", size, "red").save(output, format="JPEG")
+    return output.getvalue()
+
+
+def test_batch_optimization_runs_in_a_small_spawned_pool():
+    generator = listing_generator.ListingGenerator()
+    try:
+        results = generator.optimize_images_batch([_jpeg((1600, 1200)), _jpeg((400, 300))])
+
+        pool = generator._img_pool
+        assert pool._mp_context.get_start_method() == "spawn"
+        assert pool._max_workers == listing_generator.IMAGE_PROCESS_WORKERS == 2
+    finally:
+        if generator._img_pool is not None:
+            generator._img_pool.shutdown()
+
+    assert [Image.open(io.BytesIO(data)).size for data in results] == [(800, 600), (400, 300)]
+
+
+def test_cached_listing_depends_on_user_and_photo_order(monkeypatch):
+    generator = listing_generator.ListingGenerator()
+    calls = []
+    monkeypatch.setattr(generator, "_call_openai",
+                        lambda system, user: calls.append(user) or '{"title": "Brass lamp"}')
+
+    generator.generate_listing_from_images(["a.jpg", "b.jpg"], "lamp", "alice")
+    generator.generate_listing_from_images(["a.jpg", "b.jpg"], "lamp", "alice")
+    generator.generate_listing_from_images(["b.jpg", "a.jpg"], "lamp", "alice")
+    generator.generate_listing_from_images(["a.jpg", "b.jpg"], "lamp", "bob")
+
+    assert len(calls) == 3
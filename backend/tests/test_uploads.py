@@ -0,0 +1,81 @@
+import io
+import os
+
+import pytest
+
+import app as backend_app
+
+
+@pytest.fixture
+def client():
+    return backend_app.app.test_client()
+
+
+def _post_image(client, data=b"\xff\xd8\xff\xe0 fake jpeg"):
+    return client.post(
+        "/api/upload/image",
+        data={"image": (io.BytesIO(data), "photo.jpg")},
+        content_type="multipart/form-data",
+    )
+
+
+def test_upload_image_is_on_disk_when_response_returns(client):
+    response = _post_image(client, b"image-bytes")
+
+    assert response.status_code == 200
+    body = response.get_json()
+    with open(body["filepath"], "rb") as f:
+        assert f.read() == b"image-bytes"
+
+
+def test_upload_image_write_failure_returns_500_and_leaves_no_file(client, monkeypatch):
+    def fail(stream, filepath):
+        with open(filepath, "wb") as f:
+            f.write(b"partial")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(backend_app, "_copy_upload", fail)
+    before = set(os.listdir(backend_app.IMAGES_DIR))
+
+    response = _post_image(client)
+
+    assert response.status_code == 500
+    assert "disk full" in response.get_json()["error"]
+    assert set(os.listdir(backend_app.IMAGES_DIR)) == before
+
+
+def test_upload_image_rejects_unsupported_extension(client):
+    response = client.post(
+        "/api/upload/image",
+        data={"image": (io.BytesIO(b"x"), "notes.txt")},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 415
+
+
+def test_listing_uploads_are_written_through_run_blocking(client, monkeypatch):
+    from PIL import Image
+
+    photo = io.BytesIO()
+    Image.new("RGB", (40, 30), "blue").save(photo, format="JPEG")
+    blocking_calls = []
+
+    def run_blocking(fn, *args):
+        blocking_calls.append(fn)
+        return fn(*args)
+
+    monkeypatch.setattr(backend_app, "_run_blocking", run_blocking)
+
+    response = client.post(
+        "/api/listing/upload-images",
+        data={"images": [(io.BytesIO(photo.getvalue()), "a.jpg"), (io.BytesIO(photo.getvalue()), "b.jpg")]},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 200
+    urls = response.get_json()["imageUrls"]
+    assert blocking_calls == [backend_app._save_upload] * 2
+    for url in urls:
+        with open(os.path.join(backend_app.IMAGES_DIR, url.rsplit("/", 1)[1]), "rb") as f:
+            assert Image.open(f).size == (40, 30)
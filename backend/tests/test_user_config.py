@@ -0,0 +1,43 @@
+import json
+import os
+
+import pytest
+
+from user_config import UserConfigManager
+
+
+def _write_config(manager, user_id, config, mtime_ns):
+    path = manager.get_user_config_path(user_id)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_cached_config_reloads_when_file_changes(tmp_path):
+    manager = UserConfigManager(str(tmp_path))
+    _write_config(manager, "alice", {"ai_provider": "openai"}, 1_000_000_000)
+    assert manager.get_ai_provider("alice") == "openai"
+
+    # Same size on disk, only the mtime tells the edit apart
+    _write_config(manager, "alice", {"ai_provider": "google"}, 2_000_000_000)
+    assert manager.get_ai_provider("alice") == "google"
+
+
+def test_loaded_config_is_a_private_copy(tmp_path):
+    manager = UserConfigManager(str(tmp_path))
+    _write_config(manager, "alice", {"ai_provider": "openai"}, 1_000_000_000)
+
+    manager._load_user_config("alice")["ai_provider"] = "mutated"
+    assert manager.get_ai_provider("alice") == "openai"
+
+
+
+def test_config_view_is_read_only(tmp_path):
+    manager = UserConfigManager(str(tmp_path))
+    _write_config(manager, "alice", {"ai_provider": "openai"}, 1_000_000_000)
+
+    view = manager.get_user_config_view("alice")
+
+    assert view["ai_provider"] == "openai"
+    with pytest.raises(TypeError):
+        view["ai_provider"] = "google"
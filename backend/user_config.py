@@ -5,14 +5,21 @@ Handles user-specific settings, AI provider configuration, and OAuth authenticat
 """
 
 import os
+import copy
 import json
 import logging
-from typing import Dict, Optional, Any, List
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, Optional, Any, List, Mapping, Tuple
 from cryptography.fernet import Fernet
 from ai_oauth import SimplifiedAISetup
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on parsed configs kept in memory; least recently used users are evicted first
+CONFIG_CACHE_SIZE = 256
+
 
 class UserConfigManager:
     """Manages user-specific configurations with OAuth support"""
@@ -23,6 +30,11 @@ class UserConfigManager:
         self.cipher = Fernet(self.encryption_key)
         self.oauth_setup = SimplifiedAISetup()
         
+        # Parsed configs keyed by user_id, validated against the file's (mtime, size)
+        self._config_cache: "OrderedDict[str, Tuple[Tuple[int, int], Dict[str, Any]]]" = OrderedDict()
+        # Request handlers share the cache, and an eviction between get and move_to_end would raise
+        self._cache_lock = threading.Lock()
+        
         # Ensure config directory exists
         os.makedirs(config_dir, exist_ok=True)
     
@@ -90,7 +102,7 @@ class UserConfigManager:
             return True
             
         except Exception as e:
-            logger.error(f"Error creating user {user_id}: {e}")
+            logger.error("Error creating user %s: %s", user_id, e)
             return False
     
     def setup_user(self, user_id: str) -> bool:
@@ -277,16 +289,19 @@ class UserConfigManager:
             return True
             
         except Exception as e:
-            logger.error(f"Error validating setup: {e}")
+            logger.error("Error validating setup: %s", e)
             return False
     
+    def get_user_config_view(self, user_id: str) -> Mapping[str, Any]:
+        """Read-only view of the user's cached configuration, for lookups that need no private copy"""
+        return MappingProxyType(self._cached_user_config(user_id))
+    
     def get_ai_provider(self, user_id: str) -> Optional[str]:
         """Get user's AI provider"""
         try:
-            config = self._load_user_config(user_id)
-            return config.get("ai_provider")
+            return self._cached_user_config(user_id).get("ai_provider")
         except Exception as e:
-            logger.error(f"Error getting AI provider: {e}")
+            logger.error("Error getting AI provider: %s", e)
             return None
     
     def get_ai_api_key(self, user_id: str) -> Optional[str]:
@@ -300,7 +315,7 @@ class UserConfigManager:
                 return self._decrypt_data(encrypted_bytes)
             return None
         except Exception as e:
-            logger.error(f"Error getting AI API key: {e}")
+            logger.error("Error getting AI API key: %s", e)
             return None
     
     def set_ai_provider(self, user_id: str, provider: str, api_key: str):
@@ -313,7 +328,7 @@ class UserConfigManager:
             config["ai_api_key"] = encrypted_bytes.decode('latin1')  # Store as string
             self._save_user_config(user_id, config)
         except Exception as e:
-            logger.error(f"Error setting AI provider: {e}")
+            logger.error("Error setting AI provider: %s", e)
             raise
     
     def get_ebay_credentials(self, user_id: str) -> Dict[str, Optional[str]]:
@@ -327,7 +342,7 @@ class UserConfigManager:
                 "refresh_token": config.get("ebay_refresh_token")
             }
         except Exception as e:
-            logger.error(f"Error getting eBay credentials: {e}")
+            logger.error("Error getting eBay credentials: %s", e)
             return {}
     
     def set_ebay_refresh_token(self, user_id: str, refresh_token: str):
@@ -337,7 +352,7 @@ class UserConfigManager:
             config["ebay_refresh_token"] = refresh_token
             self._save_user_config(user_id, config)
         except Exception as e:
-            logger.error(f"Error setting eBay refresh token: {e}")
+            logger.error("Error setting eBay refresh token: %s", e)
             raise
     
     def get_preferences(self, user_id: str) -> Dict[str, Any]:
@@ -346,7 +361,7 @@ class UserConfigManager:
             config = self._load_user_config(user_id)
             return config.get("preferences", {})
         except Exception as e:
-            logger.error(f"Error getting preferences: {e}")
+            logger.error("Error getting preferences: %s", e)
             return {}
     
     def update_preferences(self, user_id: str, preferences: Dict[str, Any]):
@@ -356,7 +371,7 @@ class UserConfigManager:
             config["preferences"].update(preferences)
             self._save_user_config(user_id, config)
         except Exception as e:
-            logger.error(f"Error updating preferences: {e}")
+            logger.error("Error updating preferences: %s", e)
             raise
     
     def increment_usage(self, user_id: str, metric: str):
@@ -371,24 +386,54 @@ class UserConfigManager:
             
             self._save_user_config(user_id, config)
         except Exception as e:
-            logger.error(f"Error incrementing usage: {e}")
+            logger.error("Error incrementing usage: %s", e)
     
     def _load_user_config(self, user_id: str) -> Dict[str, Any]:
-        """Load user configuration from file"""
+        """Load user configuration from file, reusing the cached copy while the file is unchanged"""
+        # Callers mutate the returned config before saving, so never hand out the cached dict
+        return copy.deepcopy(self._cached_user_config(user_id))
+    
+    def _cached_user_config(self, user_id: str) -> Dict[str, Any]:
+        """Return the shared cached config for read-only lookups"""
         config_path = self.get_user_config_path(user_id)
         
-        if not os.path.exists(config_path):
+        try:
+            stat = os.stat(config_path)
+        except FileNotFoundError:
+            with self._cache_lock:
+                self._config_cache.pop(user_id, None)
             raise FileNotFoundError(f"User configuration not found: {user_id}")
         
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._cache_lock:
+            cached = self._config_cache.get(user_id)
+            if cached is not None and cached[0] == signature:
+                self._config_cache.move_to_end(user_id)
+                return cached[1]
+        
+        # Parse outside the lock; a concurrent reload of the same file stores an equal entry
+        with open(config_path, 'r', encoding='utf-8') as f:
+            cached = (signature, json.load(f))
+        self._remember_config(user_id, cached)
+        return cached[1]
+    
+    def _remember_config(self, user_id: str, entry: Tuple[Tuple[int, int], Dict[str, Any]]):
+        """Insert a cache entry, evicting the least recently used user past the size bound"""
+        with self._cache_lock:
+            self._config_cache[user_id] = entry
+            self._config_cache.move_to_end(user_id)
+            if len(self._config_cache) > CONFIG_CACHE_SIZE:
+                self._config_cache.popitem(last=False)
     
     def _save_user_config(self, user_id: str, config: Dict[str, Any]):
         """Save user configuration to file"""
         config_path = self.get_user_config_path(user_id)
         
-        with open(config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump(config, f, separators=(',', ':'), ensure_ascii=False)
+        
+        stat = os.stat(config_path)
+        self._remember_config(user_id, ((stat.st_mtime_ns, stat.st_size), copy.deepcopy(config)))
     
     def _get_timestamp(self) -> str:
         """Get current timestamp"""
@@ -405,13 +450,15 @@ class UserConfigManager:
                     users.append(user_id)
             return users
         except Exception as e:
-            logger.error(f"Error listing users: {e}")
+            logger.error("Error listing users: %s", e)
             return []
     
     def delete_user(self, user_id: str) -> bool:
         """Delete user configuration"""
         try:
             config_path = self.get_user_config_path(user_id)
+            with self._cache_lock:
+                self._config_cache.pop(user_id, None)
             if os.path.exists(config_path):
                 os.remove(config_path)
                 print(f"✅ User '{user_id}' deleted successfully!")
@@ -420,7 +467,7 @@ class UserConfigManager:
                 print(f"⚠️  User '{user_id}' not found.")
                 return False
         except Exception as e:
-            logger.error(f"Error deleting user {user_id}: {e}")
+            logger.error("Error deleting user %s: %s", user_id, e)
             return False
 
 
@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""
+WSGI entrypoint for running the PictoPost API under Gunicorn with gevent workers
+Usage: gunicorn -c gunicorn_conf.py wsgi:app
+"""
+
+# Patch blocking stdlib IO before anything else imports sockets or threads
+from gevent import monkey
+monkey.patch_all()
+
+from app import app  # noqa: E402
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=8000)